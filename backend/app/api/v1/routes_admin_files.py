@@ -6,6 +6,7 @@ from app.models.admin import AdminUserInDB
 from app.models.file import FileMetadataInDB, StorageLocation, UploadStatus, BackupStatus, sanitize_filename_for_display
 from app.db.mongodb import db
 from app.services.google_drive_service import gdrive_pool_manager
+from app.services.storage_service import StorageService
 from pydantic import BaseModel
 import re
 from bson import ObjectId
@@ -1194,7 +1195,7 @@ async def cleanup_orphaned_files(
         "upload_date": {"$lte": cutoff_date}
     }
     
-    orphaned_files = list(db.files.find(query, {"_id": 1, "filename": 1}))
+    orphaned_files = list(db.files.find(query, {"_id": 1, "filename": 1, "owner_id": 1, "size_bytes": 1}))
     
     if cleanup_type == "soft":
         # Mark as deleted but keep records
@@ -1211,8 +1212,10 @@ async def cleanup_orphaned_files(
         )
         action = "soft deleted (marked as deleted)"
     else:
-        # Hard delete - remove from database
-        result = db.files.delete_many(query)
+        # Hard delete - remove from database (by _id, so the owners' storage counters are
+        # decremented for exactly the records removed)
+        result = db.files.delete_many({"_id": {"$in": [file_doc["_id"] for file_doc in orphaned_files]}})
+        StorageService.adjust_user_storage_counters(orphaned_files, sign=-1)
         action = "hard deleted (removed from database)"
     
     # Log admin activity
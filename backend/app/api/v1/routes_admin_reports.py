@@ -1,20 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, BackgroundTasks
-from fastapi.responses import StreamingResponse
-from typing import List, Optional, Dict, Any
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
+from fastapi.responses import StreamingResponse, Response
+from typing import List, Optional, Dict, Any, Iterable, Callable
+from datetime import datetime, timedelta, timezone
 from pydantic import BaseModel, Field
 from bson import ObjectId
 from app.models.admin import AdminUserInDB
 from app.db.mongodb import db
-from app.services.admin_auth_service import get_current_admin, get_current_superadmin, log_admin_activity, get_client_ip
+from app.db.indexes import run_hinted
+from app.core.responses import MongoORJSONResponse
+from app.services.admin_auth_service import get_current_admin, get_current_superadmin, queue_admin_activity, get_client_ip
 import asyncio
 import uuid
 import json
+import orjson
 import io
 import csv
+import itertools
+import logging
 from enum import Enum
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Index hints for time-bounded pipelines (indexes are ensured in app.db.indexes)
+CREATED_AT_HINT = [("created_at", -1)]
+TIMESTAMP_ACTION_HINT = [("timestamp", -1), ("action", 1)]
+
+# Cap on user rows returned in the JSON report (keeps the $facet result under the 16MB document limit)
+USER_ACTIVITY_DETAILS_LIMIT = 10000
+
+# Columns of the user-activity $project stage, in CSV column order
+USER_ACTIVITY_CSV_FIELDS = [
+    "_id", "created_at", "email", "is_active", "last_login", "recent_files",
+    "recent_storage", "storage_mb", "total_files", "total_storage", "username"
+]
+
+# Columns of each storage-usage breakdown row, keyed by group_by
+STORAGE_BREAKDOWN_CSV_FIELDS = {
+    "user": ["user_email", "file_count", "storage_gb", "storage_mb"],
+    "file_type": ["file_type", "file_count", "total_storage_gb", "average_size_mb", "percentage_of_total"],
+    "storage_location": ["storage_location", "file_count", "storage_gb", "percentage_of_total"],
+    "date": ["date", "file_count", "storage_added_gb"]
+}
+
+# Number of CSV rows encoded per streamed chunk
+CSV_FLUSH_ROWS = 500
 
 # ================================
 # REPORT MODELS
@@ -52,6 +82,11 @@ class ReportRequest(BaseModel):
     include_charts: bool = False
     filters: Optional[Dict[str, Any]] = None
 
+    class Config:
+        # Request bodies are read-only; unknown keys are rejected instead of scanned and kept
+        frozen = True
+        extra = "forbid"
+
 class ScheduledReportCreate(BaseModel):
     report_type: ReportType
     title: str = Field(..., max_length=200)
@@ -62,6 +97,10 @@ class ScheduledReportCreate(BaseModel):
     filters: Optional[Dict[str, Any]] = None
     is_active: bool = True
 
+    class Config:
+        frozen = True
+        extra = "forbid"
+
 class CustomReportBuilder(BaseModel):
     title: str = Field(..., max_length=200)
     description: Optional[str] = Field(None, max_length=500)
@@ -72,35 +111,192 @@ class CustomReportBuilder(BaseModel):
     date_to: datetime
     export_format: ExportFormat = ExportFormat.JSON
 
+    class Config:
+        frozen = True
+        extra = "forbid"
+
+# ================================
+# REPORT CACHE
+# ================================
+
+# Generated reports are reused for identical (endpoint, admin, params) requests,
+# so dashboard refreshes do not re-run every aggregation
+REPORT_CACHE_TTL_SECONDS = 60
+REPORT_CACHE_MAX_ENTRIES = 128
+PREVIOUS_PERIOD_CACHE_TTL_SECONDS = 3600
+_report_cache: Dict[tuple, Dict[str, Any]] = {}
+
+def _get_cached_report(cache_key: tuple) -> Optional[Dict[str, Any]]:
+    """Return a cached report if it has not expired"""
+    cached = _report_cache.get(cache_key)
+    if cached is None:
+        return None
+    if datetime.utcnow() >= cached["expires_at"]:
+        del _report_cache[cache_key]
+        return None
+    return cached["data"]
+
+def _cache_report(
+    cache_key: tuple, report_data: Dict[str, Any], ttl_seconds: int = REPORT_CACHE_TTL_SECONDS
+) -> None:
+    """Cache a generated report, evicting the entry closest to expiry when full"""
+    if cache_key not in _report_cache and len(_report_cache) >= REPORT_CACHE_MAX_ENTRIES:
+        oldest_key = min(_report_cache, key=lambda k: _report_cache[k]["expires_at"])
+        del _report_cache[oldest_key]
+    _report_cache[cache_key] = {
+        "data": report_data,
+        "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds)
+    }
+
+# ================================
+# STORAGE BREAKDOWNS
+# ================================
+
+# Upper bound on breakdown rows so high-cardinality groupings (e.g. MIME types) stay bounded
+STORAGE_BREAKDOWN_ROW_LIMIT = 500
+
+# Pipelines that do not depend on the reporting period are built once at import time
+USER_BREAKDOWN_PIPELINE = [
+    {"$group": {
+        "_id": "$uploaded_by",
+        "file_count": {"$sum": 1},
+        "total_size": {"$sum": "$file_size"}
+    }},
+    {"$sort": {"total_size": -1}},
+    {"$limit": 50}  # Top 50 users
+]
+
+FILE_TYPE_BREAKDOWN_PIPELINE = [
+    {"$group": {
+        "_id": "$file_type",
+        "file_count": {"$sum": 1},
+        "total_size": {"$sum": "$file_size"},
+        "avg_size": {"$avg": "$file_size"}
+    }},
+    {"$sort": {"total_size": -1}},
+    {"$limit": STORAGE_BREAKDOWN_ROW_LIMIT}
+]
+
+STORAGE_LOCATION_BREAKDOWN_PIPELINE = [
+    {"$group": {
+        "_id": "$storage_location",
+        "file_count": {"$sum": 1},
+        "total_size": {"$sum": "$file_size"}
+    }},
+    {"$sort": {"total_size": -1}},
+    {"$limit": STORAGE_BREAKDOWN_ROW_LIMIT}
+]
+
+def _date_breakdown_pipeline(date_from: datetime, date_to: datetime) -> List[Dict[str, Any]]:
+    """Daily breakdown for the period"""
+    return [
+        {"$match": {"created_at": {"$gte": date_from, "$lte": date_to}}},
+        {"$group": {
+            # One date expression per document; the string sorts chronologically
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            "file_count": {"$sum": 1},
+            "total_size": {"$sum": "$file_size"}
+        }},
+        {"$sort": {"_id": 1}},
+        # At most one row per calendar day in the period
+        # (reversed ranges match nothing, but $limit must still be positive)
+        {"$limit": max((date_to.date() - date_from.date()).days + 1, 1)}
+    ]
+
+def _format_user_breakdown(item: Dict[str, Any], total_size: int) -> Dict[str, Any]:
+    return {
+        "user_email": item["_id"],
+        "file_count": item["file_count"],
+        "storage_gb": round(item["total_size"] / (1024**3), 2),
+        "storage_mb": round(item["total_size"] / (1024**2), 2)
+    }
+
+def _format_file_type_breakdown(item: Dict[str, Any], total_size: int) -> Dict[str, Any]:
+    return {
+        "file_type": item["_id"] or "unknown",
+        "file_count": item["file_count"],
+        "total_storage_gb": round(item["total_size"] / (1024**3), 2),
+        "average_size_mb": round(item["avg_size"] / (1024**2), 2),
+        "percentage_of_total": round((item["total_size"] / max(total_size, 1)) * 100, 2)
+    }
+
+def _format_storage_location_breakdown(item: Dict[str, Any], total_size: int) -> Dict[str, Any]:
+    return {
+        "storage_location": item["_id"],
+        "file_count": item["file_count"],
+        "storage_gb": round(item["total_size"] / (1024**3), 2),
+        "percentage_of_total": round((item["total_size"] / max(total_size, 1)) * 100, 2)
+    }
+
+def _format_date_breakdown(item: Dict[str, Any], total_size: int) -> Dict[str, Any]:
+    return {
+        "date": item["_id"],
+        "file_count": item["file_count"],
+        "storage_added_gb": round(item["total_size"] / (1024**3), 2)
+    }
+
+# group_by -> (date_from, date_to) -> pipeline
+STORAGE_BREAKDOWN_PIPELINES: Dict[str, Callable[[datetime, datetime], List[Dict[str, Any]]]] = {
+    "user": lambda date_from, date_to: USER_BREAKDOWN_PIPELINE,
+    "file_type": lambda date_from, date_to: FILE_TYPE_BREAKDOWN_PIPELINE,
+    "storage_location": lambda date_from, date_to: STORAGE_LOCATION_BREAKDOWN_PIPELINE,
+    "date": _date_breakdown_pipeline
+}
+
+# Only the period-bounded breakdown leads with a created_at range worth hinting
+STORAGE_BREAKDOWN_HINTS = {
+    "date": CREATED_AT_HINT
+}
+
+# group_by -> (aggregation row, total storage bytes) -> report row
+STORAGE_BREAKDOWN_FORMATTERS: Dict[str, Callable[[Dict[str, Any], int], Dict[str, Any]]] = {
+    "user": _format_user_breakdown,
+    "file_type": _format_file_type_breakdown,
+    "storage_location": _format_storage_location_breakdown,
+    "date": _format_date_breakdown
+}
+
 # ================================
 # SYSTEM REPORTS ENDPOINTS
 # ================================
 
-@router.get("/reports/system-overview")
-async def generate_system_overview_report(
-    request: Request,
-    date_from: datetime = Query(...),
-    date_to: datetime = Query(...),
-    export_format: ExportFormat = Query(ExportFormat.JSON),
-    current_admin: AdminUserInDB = Depends(get_current_admin)
-):
-    """Generate comprehensive system overview report"""
-    # db is imported directly
+def _as_naive_utc(value: datetime) -> datetime:
+    """Convert an offset-aware query datetime to the naive UTC form stored in MongoDB"""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def _previous_period_counts(previous_period_start: datetime, date_from: datetime) -> Dict[str, int]:
+    """Count users and files created in the comparison period before the report period"""
+    previous_period_start = _as_naive_utc(previous_period_start)
+    date_from = _as_naive_utc(date_from)
+    cache_key = ("previous_period_counts", previous_period_start, date_from)
+    counts = _get_cached_report(cache_key)
+    if counts is not None:
+        return counts
     
-    # Validate date range
-    if date_from >= date_to:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Start date must be before end date"
-        )
+    previous_period_match = {"created_at": {"$gte": previous_period_start, "$lt": date_from}}
+    counts = {
+        "users": run_hinted(db.users.count_documents, previous_period_match, hint=CREATED_AT_HINT),
+        "files": run_hinted(db.files.count_documents, previous_period_match, hint=CREATED_AT_HINT)
+    }
     
+    # A window that is entirely in the past no longer changes, so it can be kept much longer
+    if date_from <= datetime.utcnow():
+        _cache_report(cache_key, counts, ttl_seconds=PREVIOUS_PERIOD_CACHE_TTL_SECONDS)
+    return counts
+
+def _build_system_overview_report(
+    date_from: datetime, date_to: datetime, include_growth: bool, generated_by: str
+) -> Dict[str, Any]:
+    """Run the system overview queries and assemble the report"""
     # System Overview Data
     report_data = {
         "report_info": {
             "type": "system_overview",
             "title": "System Overview Report",
             "generated_at": datetime.utcnow().isoformat(),
-            "generated_by": current_admin.email,
+            "generated_by": generated_by,
             "period": {
                 "from": date_from.isoformat(),
                 "to": date_to.isoformat(),
@@ -111,16 +307,21 @@ async def generate_system_overview_report(
         "file_statistics": {},
         "storage_statistics": {},
         "admin_activity": {},
-        "system_performance": {},
-        "growth_metrics": {}
+        "system_performance": {}
     }
     
-    # User Statistics
-    total_users = db.users.count_documents({})
-    active_users = db.users.count_documents({"is_active": True})
-    new_users_period = db.users.count_documents({
-        "created_at": {"$gte": date_from, "$lte": date_to}
-    })
+    period_match = {"created_at": {"$gte": date_from, "$lte": date_to}}
+    
+    # User Statistics (unfiltered total from collection metadata, filtered counts in one $facet)
+    total_users = db.users.estimated_document_count()
+    user_facets = list(db.users.aggregate([
+        {"$facet": {
+            "active": [{"$match": {"is_active": True}}, {"$count": "n"}],
+            "in_period": [{"$match": period_match}, {"$count": "n"}]
+        }}
+    ]))[0]
+    active_users = _facet_count(user_facets, "active")
+    new_users_period = _facet_count(user_facets, "in_period")
     
     report_data["user_statistics"] = {
         "total_users": total_users,
@@ -130,75 +331,74 @@ async def generate_system_overview_report(
         "growth_rate": (new_users_period / max(total_users - new_users_period, 1)) * 100
     }
     
-    # File Statistics
-    total_files = db.files.count_documents({})
-    files_in_period = db.files.count_documents({
-        "created_at": {"$gte": date_from, "$lte": date_to}
-    })
-    
-    # Storage statistics
-    storage_pipeline = [
-        {"$group": {
-            "_id": None,
-            "total_size": {"$sum": "$file_size"},
-            "avg_size": {"$avg": "$file_size"},
-            "max_size": {"$max": "$file_size"}
+    # File and storage statistics (single round-trip: counts, storage and type distribution)
+    file_facets = list(db.files.aggregate([
+        {"$facet": {
+            "total": [{"$group": {
+                "_id": None,
+                "total_size": {"$sum": "$file_size"},
+                "avg_size": {"$avg": "$file_size"},
+                "max_size": {"$max": "$file_size"}
+            }}],
+            "in_period": [{"$match": period_match}, {"$count": "n"}],
+            "types": [
+                {"$group": {
+                    "_id": "$file_type",
+                    "count": {"$sum": 1},
+                    "total_size": {"$sum": "$file_size"}
+                }},
+                {"$sort": {"count": -1}},
+                {"$limit": 10}  # Top 10 file types
+            ]
         }}
-    ]
-    storage_stats = list(db.files.aggregate(storage_pipeline))
-    storage_data = storage_stats[0] if storage_stats else {
+    ]))[0]
+    storage_data = file_facets["total"][0] if file_facets["total"] else {
         "total_size": 0, "avg_size": 0, "max_size": 0
     }
+    total_files = db.files.estimated_document_count()
+    files_in_period = _facet_count(file_facets, "in_period")
     
     report_data["file_statistics"] = {
         "total_files": total_files,
         "files_uploaded_in_period": files_in_period,
         "total_storage_bytes": storage_data["total_size"],
         "total_storage_gb": round(storage_data["total_size"] / (1024**3), 2),
-        "average_file_size_mb": round(storage_data["avg_size"] / (1024**2), 2),
-        "largest_file_size_mb": round(storage_data["max_size"] / (1024**2), 2)
+        "average_file_size_mb": round((storage_data["avg_size"] or 0) / (1024**2), 2),
+        "largest_file_size_mb": round((storage_data["max_size"] or 0) / (1024**2), 2)
     }
     
     # File type distribution
-    file_type_pipeline = [
-        {"$group": {
-            "_id": "$file_type",
-            "count": {"$sum": 1},
-            "total_size": {"$sum": "$file_size"}
-        }},
-        {"$sort": {"count": -1}}
-    ]
-    file_types = list(db.files.aggregate(file_type_pipeline))
-    
     report_data["file_statistics"]["type_distribution"] = [
         {
             "type": item["_id"] or "unknown",
             "count": item["count"],
             "size_gb": round(item["total_size"] / (1024**3), 2)
         }
-        for item in file_types[:10]  # Top 10 file types
+        for item in file_facets["types"]
     ]
     
-    # Admin Activity Statistics
-    admin_activity_count = db.admin_activity_logs.count_documents({
-        "timestamp": {"$gte": date_from, "$lte": date_to}
-    })
-    
-    admin_activity_pipeline = [
+    # Admin Activity Statistics (single round-trip: total and top actions)
+    admin_facets = list(run_hinted(db.admin_activity_logs.aggregate, [
         {"$match": {"timestamp": {"$gte": date_from, "$lte": date_to}}},
-        {"$group": {
-            "_id": "$action",
-            "count": {"$sum": 1}
-        }},
-        {"$sort": {"count": -1}}
-    ]
-    top_admin_actions = list(db.admin_activity_logs.aggregate(admin_activity_pipeline))
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "top_actions": [
+                {"$group": {
+                    "_id": "$action",
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"count": -1}},
+                {"$limit": 10}
+            ]
+        }}
+    ], hint=TIMESTAMP_ACTION_HINT))[0]
+    admin_activity_count = _facet_count(admin_facets, "total")
     
     report_data["admin_activity"] = {
         "total_actions": admin_activity_count,
         "top_actions": [
             {"action": item["_id"], "count": item["count"]}
-            for item in top_admin_actions[:10]
+            for item in admin_facets["top_actions"]
         ]
     }
     
@@ -211,14 +411,14 @@ async def generate_system_overview_report(
         "peak_concurrent_users": max(active_users // 10, 1)
     }
     
+    if not include_growth:
+        return report_data
+    
     # Growth Metrics
     previous_period_start = date_from - (date_to - date_from)
-    previous_users = db.users.count_documents({
-        "created_at": {"$gte": previous_period_start, "$lt": date_from}
-    })
-    previous_files = db.files.count_documents({
-        "created_at": {"$gte": previous_period_start, "$lt": date_from}
-    })
+    previous_counts = _previous_period_counts(previous_period_start, date_from)
+    previous_users = previous_counts["users"]
+    previous_files = previous_counts["files"]
     
     report_data["growth_metrics"] = {
         "user_growth_percentage": (
@@ -235,7 +435,34 @@ async def generate_system_overview_report(
         }
     }
     
-    await log_admin_activity(
+    return report_data
+
+@router.get("/reports/system-overview")
+async def generate_system_overview_report(
+    request: Request,
+    date_from: datetime = Query(...),
+    date_to: datetime = Query(...),
+    export_format: ExportFormat = Query(ExportFormat.JSON),
+    include_growth: bool = Query(True),
+    current_admin: AdminUserInDB = Depends(get_current_admin)
+):
+    """Generate comprehensive system overview report"""
+    # db is imported directly
+    
+    # Validate date range
+    if date_from >= date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Start date must be before end date"
+        )
+    
+    cache_key = ("system_overview", current_admin.email, date_from, date_to, include_growth)
+    report_data = _get_cached_report(cache_key)
+    if report_data is None:
+        report_data = _build_system_overview_report(date_from, date_to, include_growth, current_admin.email)
+        _cache_report(cache_key, report_data)
+    
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="generate_system_overview_report",
         details=f"Generated system overview report for {(date_to - date_from).days} days",
@@ -245,7 +472,7 @@ async def generate_system_overview_report(
     
     # Return based on format
     if export_format == ExportFormat.JSON:
-        return report_data
+        return MongoORJSONResponse(report_data)
     elif export_format == ExportFormat.CSV:
         return await export_to_csv(report_data, "system_overview_report")
     else:
@@ -254,6 +481,82 @@ async def generate_system_overview_report(
             detail=f"Export format {export_format} not yet supported"
         )
 
+def _build_user_activity_report(
+    user_activity_pipeline: List[Dict[str, Any]],
+    date_from: datetime,
+    date_to: datetime,
+    include_inactive: bool,
+    generated_by: str
+) -> Dict[str, Any]:
+    """Run the user activity aggregation and assemble the report with its summary"""
+    # Summary totals are reduced server-side in the same aggregation as the user rows
+    facet_result = list(db.users.aggregate([
+        *user_activity_pipeline,
+        {"$facet": {
+            "users": [{"$limit": USER_ACTIVITY_DETAILS_LIMIT}],
+            "summary": [{"$group": {
+                "_id": None,
+                "active_users": {"$sum": {"$cond": [{"$gt": ["$recent_files", 0]}, 1, 0]}},
+                "total_recent": {"$sum": "$recent_files"},
+                "total_storage": {"$sum": "$total_storage"},
+                "n": {"$sum": 1}
+            }}]
+        }}
+    ]))[0]
+    users_data = facet_result["users"]
+    summary = facet_result["summary"][0] if facet_result["summary"] else {
+        "active_users": 0, "total_recent": 0, "total_storage": 0, "n": 0
+    }
+    
+    # Activity summary
+    activity_summary = {
+        "total_users_analyzed": summary["n"],
+        "active_users_in_period": summary["active_users"],
+        "total_files_in_period": summary["total_recent"],
+        "total_storage_in_period_gb": round(summary["total_storage"] / (1024**3), 2),
+        "average_files_per_active_user": 0,
+        "top_users_by_activity": []
+    }
+    
+    # Only active users contribute recent files, so their average is total / active
+    if summary["active_users"]:
+        activity_summary["average_files_per_active_user"] = round(
+            summary["total_recent"] / summary["active_users"], 2
+        )
+    
+    # Top 10 most active users
+    activity_summary["top_users_by_activity"] = [
+        {
+            "email": user["email"],
+            "username": user["username"],
+            "files_in_period": user["recent_files"],
+            "total_files": user["total_files"],
+            "storage_mb": user["storage_mb"]
+        }
+        for user in users_data[:10]
+    ]
+    
+    report_data = {
+        "report_info": {
+            "type": "user_activity",
+            "title": "User Activity Report",
+            "generated_at": datetime.utcnow().isoformat(),
+            "generated_by": generated_by,
+            "period": {
+                "from": date_from.isoformat(),
+                "to": date_to.isoformat(),
+                "days": (date_to - date_from).days
+            },
+            "filters": {
+                "include_inactive": include_inactive
+            }
+        },
+        "summary": activity_summary,
+        "user_details": users_data
+    }
+    
+    return report_data
+
 @router.get("/reports/user-activity")
 async def generate_user_activity_report(
     request: Request,
@@ -274,28 +577,43 @@ async def generate_user_activity_report(
     # Get user activity data
     user_activity_pipeline = [
         {"$match": user_filter},
+        # Only join files created in the reporting period so the lookup can use the
+        # files.created_at index instead of pulling every file per user into memory
+        {"$lookup": {
+            "from": "files",
+            "let": {"u_email": "$email"},
+            "pipeline": [
+                {"$match": {
+                    "$expr": {"$eq": ["$uploaded_by", "$$u_email"]},
+                    "created_at": {"$gte": date_from, "$lte": date_to}
+                }},
+                # Excluding _id keeps this sub-pipeline covered by the
+                # (uploaded_by, created_at, file_size) index
+                {"$project": {"file_size": 1, "_id": 0}}
+            ],
+            "as": "recent_files_docs"
+        }},
+        # Lifetime totals are reduced inside the lookup, so only one small document is joined
         {"$lookup": {
             "from": "files",
-            "localField": "email",
-            "foreignField": "uploaded_by",
-            "as": "files"
+            "let": {"u_email": "$email"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$uploaded_by", "$$u_email"]}}},
+                # Thin documents only: the (uploaded_by, created_at, file_size) index covers this
+                {"$project": {"file_size": 1, "_id": 0}},
+                {"$group": {
+                    "_id": None,
+                    "total": {"$sum": 1},
+                    "size": {"$sum": "$file_size"}
+                }}
+            ],
+            "as": "lifetime_totals"
         }},
         {"$addFields": {
-            "total_files": {"$size": "$files"},
-            "total_storage": {"$sum": "$files.file_size"},
-            "recent_files": {
-                "$size": {
-                    "$filter": {
-                        "input": "$files",
-                        "cond": {
-                            "$and": [
-                                {"$gte": ["$$this.created_at", date_from]},
-                                {"$lte": ["$$this.created_at", date_to]}
-                            ]
-                        }
-                    }
-                }
-            }
+            "total_files": {"$ifNull": [{"$arrayElemAt": ["$lifetime_totals.total", 0]}, 0]},
+            "total_storage": {"$ifNull": [{"$arrayElemAt": ["$lifetime_totals.size", 0]}, 0]},
+            "recent_files": {"$size": "$recent_files_docs"},
+            "recent_storage": {"$sum": "$recent_files_docs.file_size"}
         }},
         {"$project": {
             "email": 1,
@@ -306,96 +624,61 @@ async def generate_user_activity_report(
             "total_files": 1,
             "total_storage": 1,
             "recent_files": 1,
+            "recent_storage": 1,
             "storage_mb": {"$round": [{"$divide": ["$total_storage", 1048576]}, 2]}
         }},
         {"$sort": {"recent_files": -1}}
     ]
     
-    users_data = list(db.users.aggregate(user_activity_pipeline))
-    
-    # Activity summary
-    activity_summary = {
-        "total_users_analyzed": len(users_data),
-        "active_users_in_period": sum(1 for user in users_data if user["recent_files"] > 0),
-        "total_files_in_period": sum(user["recent_files"] for user in users_data),
-        "total_storage_in_period_gb": round(sum(user["total_storage"] for user in users_data) / (1024**3), 2),
-        "average_files_per_active_user": 0,
-        "top_users_by_activity": []
-    }
-    
-    active_users = [user for user in users_data if user["recent_files"] > 0]
-    if active_users:
-        activity_summary["average_files_per_active_user"] = round(
-            sum(user["recent_files"] for user in active_users) / len(active_users), 2
+    if export_format == ExportFormat.CSV:
+        # The CSV export carries no summary, so rows stream straight off the cursor
+        queue_admin_activity(
+            admin_email=current_admin.email,
+            action="generate_user_activity_report",
+            details="Exported user activity report as CSV",
+            ip_address=get_client_ip(request),
+            endpoint="/api/v1/admin/reports/user-activity"
+        )
+        return await export_to_csv(
+            db.users.aggregate(user_activity_pipeline, batchSize=1000),
+            "user_activity_report",
+            fieldnames=USER_ACTIVITY_CSV_FIELDS
         )
     
-    # Top 10 most active users
-    activity_summary["top_users_by_activity"] = [
-        {
-            "email": user["email"],
-            "username": user["username"],
-            "files_in_period": user["recent_files"],
-            "total_files": user["total_files"],
-            "storage_mb": user["storage_mb"]
-        }
-        for user in users_data[:10]
-    ]
-    
-    report_data = {
-        "report_info": {
-            "type": "user_activity",
-            "title": "User Activity Report",
-            "generated_at": datetime.utcnow().isoformat(),
-            "generated_by": current_admin.email,
-            "period": {
-                "from": date_from.isoformat(),
-                "to": date_to.isoformat(),
-                "days": (date_to - date_from).days
-            },
-            "filters": {
-                "include_inactive": include_inactive
-            }
-        },
-        "summary": activity_summary,
-        "user_details": users_data
-    }
+    cache_key = ("user_activity", current_admin.email, date_from, date_to, include_inactive)
+    report_data = _get_cached_report(cache_key)
+    if report_data is None:
+        report_data = _build_user_activity_report(
+            user_activity_pipeline, date_from, date_to, include_inactive, current_admin.email
+        )
+        _cache_report(cache_key, report_data)
     
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="generate_user_activity_report",
-        details=f"Generated user activity report for {len(users_data)} users",
+        details=f"Generated user activity report for {report_data['summary']['total_users_analyzed']} users",
         ip_address=get_client_ip(request),
         endpoint="/api/v1/admin/reports/user-activity"
     )
     
     if export_format == ExportFormat.JSON:
-        return report_data
-    elif export_format == ExportFormat.CSV:
-        return await export_to_csv(report_data["user_details"], "user_activity_report")
+        return MongoORJSONResponse(report_data)
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Export format {export_format} not yet supported"
         )
 
-@router.get("/reports/storage-usage")
-async def generate_storage_usage_report(
-    request: Request,
-    date_from: datetime = Query(...),
-    date_to: datetime = Query(...),
-    export_format: ExportFormat = Query(ExportFormat.JSON),
-    group_by: str = Query("user", pattern="^(user|file_type|storage_location|date)$"),
-    current_admin: AdminUserInDB = Depends(get_current_admin)
-):
-    """Generate detailed storage usage report"""
-    # db is imported directly
-    
+def _build_storage_usage_report(
+    date_from: datetime, date_to: datetime, group_by: str, generated_by: str
+) -> Dict[str, Any]:
+    """Run the storage usage queries and assemble the report"""
     report_data = {
         "report_info": {
             "type": "storage_usage",
             "title": "Storage Usage Report",
             "generated_at": datetime.utcnow().isoformat(),
-            "generated_by": current_admin.email,
+            "generated_by": generated_by,
             "period": {
                 "from": date_from.isoformat(),
                 "to": date_to.isoformat(),
@@ -407,11 +690,11 @@ async def generate_storage_usage_report(
         "detailed_breakdown": []
     }
     
-    # Overall summary
+    # Overall summary (unfiltered file count comes from collection metadata)
+    total_files = db.files.estimated_document_count()
     total_pipeline = [
         {"$group": {
             "_id": None,
-            "total_files": {"$sum": 1},
             "total_size": {"$sum": "$file_size"},
             "avg_size": {"$avg": "$file_size"}
         }}
@@ -427,13 +710,13 @@ async def generate_storage_usage_report(
     ]
     
     total_stats = list(db.files.aggregate(total_pipeline))
-    period_stats = list(db.files.aggregate(period_pipeline))
+    period_stats = list(run_hinted(db.files.aggregate, period_pipeline, hint=CREATED_AT_HINT))
     
-    total_data = total_stats[0] if total_stats else {"total_files": 0, "total_size": 0, "avg_size": 0}
+    total_data = total_stats[0] if total_stats else {"total_size": 0, "avg_size": 0}
     period_data = period_stats[0] if period_stats else {"period_files": 0, "period_size": 0}
     
     report_data["summary"] = {
-        "total_files": total_data["total_files"],
+        "total_files": total_files,
         "total_storage_gb": round(total_data["total_size"] / (1024**3), 2),
         "files_in_period": period_data["period_files"],
         "storage_added_in_period_gb": round(period_data["period_size"] / (1024**3), 2),
@@ -441,99 +724,34 @@ async def generate_storage_usage_report(
     }
     
     # Detailed breakdown based on group_by parameter
-    if group_by == "user":
-        breakdown_pipeline = [
-            {"$group": {
-                "_id": "$uploaded_by",
-                "file_count": {"$sum": 1},
-                "total_size": {"$sum": "$file_size"}
-            }},
-            {"$sort": {"total_size": -1}},
-            {"$limit": 50}  # Top 50 users
-        ]
-        
-        breakdown_data = list(db.files.aggregate(breakdown_pipeline))
-        report_data["detailed_breakdown"] = [
-            {
-                "user_email": item["_id"],
-                "file_count": item["file_count"],
-                "storage_gb": round(item["total_size"] / (1024**3), 2),
-                "storage_mb": round(item["total_size"] / (1024**2), 2)
-            }
-            for item in breakdown_data
-        ]
-        
-    elif group_by == "file_type":
-        breakdown_pipeline = [
-            {"$group": {
-                "_id": "$file_type",
-                "file_count": {"$sum": 1},
-                "total_size": {"$sum": "$file_size"},
-                "avg_size": {"$avg": "$file_size"}
-            }},
-            {"$sort": {"total_size": -1}}
-        ]
-        
-        breakdown_data = list(db.files.aggregate(breakdown_pipeline))
-        report_data["detailed_breakdown"] = [
-            {
-                "file_type": item["_id"] or "unknown",
-                "file_count": item["file_count"],
-                "total_storage_gb": round(item["total_size"] / (1024**3), 2),
-                "average_size_mb": round(item["avg_size"] / (1024**2), 2),
-                "percentage_of_total": round((item["total_size"] / max(total_data["total_size"], 1)) * 100, 2)
-            }
-            for item in breakdown_data
-        ]
-        
-    elif group_by == "storage_location":
-        breakdown_pipeline = [
-            {"$group": {
-                "_id": "$storage_location",
-                "file_count": {"$sum": 1},
-                "total_size": {"$sum": "$file_size"}
-            }},
-            {"$sort": {"total_size": -1}}
-        ]
-        
-        breakdown_data = list(db.files.aggregate(breakdown_pipeline))
-        report_data["detailed_breakdown"] = [
-            {
-                "storage_location": item["_id"],
-                "file_count": item["file_count"],
-                "storage_gb": round(item["total_size"] / (1024**3), 2),
-                "percentage_of_total": round((item["total_size"] / max(total_data["total_size"], 1)) * 100, 2)
-            }
-            for item in breakdown_data
-        ]
-        
-    elif group_by == "date":
-        # Daily breakdown for the period
-        breakdown_pipeline = [
-            {"$match": {"created_at": {"$gte": date_from, "$lte": date_to}}},
-            {"$group": {
-                "_id": {
-                    "year": {"$year": "$created_at"},
-                    "month": {"$month": "$created_at"},
-                    "day": {"$dayOfMonth": "$created_at"}
-                },
-                "file_count": {"$sum": 1},
-                "total_size": {"$sum": "$file_size"}
-            }},
-            {"$sort": {"_id": 1}}
-        ]
-        
-        breakdown_data = list(db.files.aggregate(breakdown_pipeline))
-        report_data["detailed_breakdown"] = [
-            {
-                "date": f"{item['_id']['year']}-{item['_id']['month']:02d}-{item['_id']['day']:02d}",
-                "file_count": item["file_count"],
-                "storage_added_gb": round(item["total_size"] / (1024**3), 2)
-            }
-            for item in breakdown_data
-        ]
+    breakdown_pipeline = STORAGE_BREAKDOWN_PIPELINES[group_by](date_from, date_to)
+    format_row = STORAGE_BREAKDOWN_FORMATTERS[group_by]
+    report_data["detailed_breakdown"] = [
+        format_row(item, total_data["total_size"])
+        for item in run_hinted(db.files.aggregate, breakdown_pipeline, hint=STORAGE_BREAKDOWN_HINTS.get(group_by))
+    ]
     
-    await log_admin_activity(
+    return report_data
+
+@router.get("/reports/storage-usage")
+async def generate_storage_usage_report(
+    request: Request,
+    date_from: datetime = Query(...),
+    date_to: datetime = Query(...),
+    export_format: ExportFormat = Query(ExportFormat.JSON),
+    group_by: str = Query("user", pattern="^(user|file_type|storage_location|date)$"),
+    current_admin: AdminUserInDB = Depends(get_current_admin)
+):
+    """Generate detailed storage usage report"""
+    # db is imported directly
+    
+    cache_key = ("storage_usage", current_admin.email, date_from, date_to, group_by)
+    report_data = _get_cached_report(cache_key)
+    if report_data is None:
+        report_data = _build_storage_usage_report(date_from, date_to, group_by, current_admin.email)
+        _cache_report(cache_key, report_data)
+    
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="generate_storage_usage_report",
         details=f"Generated storage usage report grouped by {group_by}",
@@ -542,9 +760,13 @@ async def generate_storage_usage_report(
     )
     
     if export_format == ExportFormat.JSON:
-        return report_data
+        return MongoORJSONResponse(report_data)
     elif export_format == ExportFormat.CSV:
-        return await export_to_csv(report_data["detailed_breakdown"], f"storage_usage_by_{group_by}_report")
+        return await export_to_csv(
+            report_data["detailed_breakdown"],
+            f"storage_usage_by_{group_by}_report",
+            fieldnames=STORAGE_BREAKDOWN_CSV_FIELDS[group_by]
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -555,6 +777,35 @@ async def generate_storage_usage_report(
 # CUSTOM REPORT BUILDER
 # ================================
 
+# Per-source row cap when no custom aggregation pipeline is supplied
+CUSTOM_REPORT_SOURCE_LIMIT = 1000
+
+def _custom_date_field(collection_name: str) -> str:
+    """Date field used for the custom report period filter"""
+    # Most collections use created_at
+    return "timestamp" if collection_name == "admin_activity_logs" else "created_at"
+
+def _custom_source_pipeline(collection_name: str, report_config: CustomReportBuilder) -> List[Dict[str, Any]]:
+    """Build the per-collection stages of a custom report, tagging rows with their source"""
+    stages = [{"$match": {
+        _custom_date_field(collection_name): {
+            "$gte": report_config.date_from,
+            "$lte": report_config.date_to
+        }
+    }}]
+    
+    # Use custom aggregation pipeline if provided
+    if report_config.aggregation_pipeline:
+        stages += report_config.aggregation_pipeline
+    else:
+        # Simple field projection, trimmed server-side; without explicit fields only _id is dropped
+        projection = {field: 1 for field in report_config.fields} if report_config.fields else {"_id": 0}
+        stages.append({"$project": projection})
+        stages.append({"$limit": CUSTOM_REPORT_SOURCE_LIMIT})  # Limit to prevent memory issues
+    
+    stages.append({"$addFields": {"_data_source": collection_name}})
+    return stages
+
 @router.post("/reports/custom")
 async def generate_custom_report(
     report_config: CustomReportBuilder,
@@ -594,41 +845,40 @@ async def generate_custom_report(
         "results": {}
     }
     
-    # Process each data source
-    for collection_name in report_config.data_sources:
-        collection = getattr(db, collection_name)
-        
-        # Build base query with date filter
-        base_query = {}
-        date_field = "created_at"  # Most collections use this
-        if collection_name == "admin_activity_logs":
-            date_field = "timestamp"
-        
-        base_query[date_field] = {
-            "$gte": report_config.date_from,
-            "$lte": report_config.date_to
-        }
-        
-        # Use custom aggregation pipeline if provided
-        if report_config.aggregation_pipeline:
-            pipeline = [{"$match": base_query}] + report_config.aggregation_pipeline
-            results = list(collection.aggregate(pipeline))
-        else:
-            # Simple field projection
-            projection = {field: 1 for field in report_config.fields} if report_config.fields else {}
-            results = list(collection.find(base_query, projection).limit(1000))  # Limit to prevent memory issues
-            
-            # Convert ObjectId to string
-            for item in results:
-                if "_id" in item:
-                    item["_id"] = str(item["_id"])
+    # Query every data source in one aggregation: the first collection's pipeline
+    # fans out to the others with $unionWith and each document is tagged with its source
+    data_sources = list(dict.fromkeys(report_config.data_sources))
+    results_by_source: Dict[str, List[Dict[str, Any]]] = {name: [] for name in data_sources}
+    result_keys = set()
+    
+    if data_sources:
+        first_source, *other_sources = data_sources
+        pipeline = _custom_source_pipeline(first_source, report_config) + [
+            {"$unionWith": {
+                "coll": collection_name,
+                "pipeline": _custom_source_pipeline(collection_name, report_config)
+            }}
+            for collection_name in other_sources
+        ]
         
+        cursor = run_hinted(
+            db[first_source].aggregate,
+            pipeline,
+            hint=[(_custom_date_field(first_source), -1)],
+            batchSize=1000
+        )
+        for item in cursor:
+            results_by_source[item.pop("_data_source")].append(item)
+            # Collect CSV columns in the same pass instead of re-scanning the rows later
+            result_keys.update(item)
+    
+    for collection_name, results in results_by_source.items():
         report_data["results"][collection_name] = {
             "count": len(results),
             "data": results
         }
     
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="generate_custom_report",
         details=f"Generated custom report: {report_config.title}",
@@ -637,15 +887,20 @@ async def generate_custom_report(
     )
     
     if report_config.export_format == ExportFormat.JSON:
-        return report_data
+        # ObjectId values in the raw documents are encoded by the response class
+        return MongoORJSONResponse(report_data)
     elif report_config.export_format == ExportFormat.CSV:
         # Flatten all results for CSV export
-        all_data = []
-        for source, data in report_data["results"].items():
-            for item in data["data"]:
-                item["_data_source"] = source
-                all_data.append(item)
-        return await export_to_csv(all_data, f"custom_report_{report_config.title.replace(' ', '_')}")
+        all_data = (
+            {**item, "_data_source": source}
+            for source, data in report_data["results"].items()
+            for item in data["data"]
+        )
+        return await export_to_csv(
+            all_data,
+            f"custom_report_{report_config.title.replace(' ', '_')}",
+            fieldnames=sorted(result_keys | {"_data_source"})
+        )
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -656,6 +911,13 @@ async def generate_custom_report(
 # REPORT SCHEDULING (Future Implementation)
 # ================================
 
+# For now, the list is always empty - full implementation would store schedules in DB
+SCHEDULED_REPORTS_RESPONSE_BODY = orjson.dumps({
+    "scheduled_reports": [],
+    "total": 0,
+    "note": "Report scheduling feature coming soon"
+})
+
 @router.get("/reports/scheduled")
 async def get_scheduled_reports(
     request: Request,
@@ -664,10 +926,7 @@ async def get_scheduled_reports(
     """Get all scheduled reports"""
     # db is imported directly
     
-    # For now, return empty list - full implementation would store schedules in DB
-    scheduled_reports = []
-    
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_scheduled_reports",
         details="Viewed scheduled reports list",
@@ -675,11 +934,7 @@ async def get_scheduled_reports(
         endpoint="/api/v1/admin/reports/scheduled"
     )
     
-    return {
-        "scheduled_reports": scheduled_reports,
-        "total": len(scheduled_reports),
-        "note": "Report scheduling feature coming soon"
-    }
+    return Response(content=SCHEDULED_REPORTS_RESPONSE_BODY, media_type="application/json")
 
 @router.post("/reports/schedule")
 async def create_scheduled_report(
@@ -689,7 +944,7 @@ async def create_scheduled_report(
 ):
     """Create a new scheduled report (placeholder for future implementation)"""
     
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="create_scheduled_report",
         details=f"Attempted to create scheduled report: {schedule_config.title}",
@@ -710,58 +965,116 @@ async def create_scheduled_report(
 # EXPORT UTILITIES
 # ================================
 
-async def export_to_csv(data: List[Dict[str, Any]], filename: str) -> StreamingResponse:
-    """Export data to CSV format"""
-    if not data:
-        # Create empty CSV
-        output = io.StringIO()
-        output.write("No data available for the selected criteria\n")
-        output.seek(0)
+def _facet_count(facet_result: Dict[str, Any], name: str) -> int:
+    """Read a `{"$count": "n"}` sub-pipeline result out of a $facet document"""
+    arm = facet_result.get(name) or []
+    return arm[0]["n"] if arm else 0
+
+def _csv_value(value: Any) -> Any:
+    """Convert a document value to a CSV cell (nested objects and arrays become JSON)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+async def export_to_csv(
+    data: Iterable[Dict[str, Any]],
+    filename: str,
+    fieldnames: Optional[List[str]] = None
+) -> StreamingResponse:
+    """Export data to CSV format, encoding and streaming rows in chunks
+    
+    `data` may be a list or a Mongo cursor. When `fieldnames` is given the rows
+    are consumed lazily in a single pass and columns keep the caller's order;
+    only dynamic schemas (custom reports) fall back to a key-discovery pass.
+    """
+    headers = {"Content-Disposition": f"attachment; filename={filename}.csv"}
+    
+    if fieldnames is None:
+        # Get all unique keys from all dictionaries
+        data = list(data)
+        all_keys = set()
+        for item in data:
+            all_keys.update(item.keys())
         
+        # Sort keys for consistent column order
+        fieldnames = sorted(all_keys)
+    
+    rows = iter(data)
+    first_row = next(rows, None)
+    if first_row is None:
+        # Create empty CSV
         return StreamingResponse(
-            io.BytesIO(output.getvalue().encode()),
+            iter([b"No data available for the selected criteria\n"]),
             media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
+            headers=headers
         )
     
-    # Get all unique keys from all dictionaries
-    all_keys = set()
-    for item in data:
-        all_keys.update(item.keys())
-    
-    # Sort keys for consistent column order
-    fieldnames = sorted(all_keys)
-    
-    # Create CSV content
-    output = io.StringIO()
-    writer = csv.DictWriter(output, fieldnames=fieldnames)
-    writer.writeheader()
-    
-    for item in data:
-        # Handle nested objects and arrays by converting to string
-        csv_row = {}
-        for key in fieldnames:
-            value = item.get(key)
-            if isinstance(value, (dict, list)):
-                csv_row[key] = json.dumps(value)
-            elif isinstance(value, datetime):
-                csv_row[key] = value.isoformat()
-            else:
-                csv_row[key] = value
-        writer.writerow(csv_row)
-    
-    output.seek(0)
-    
-    return StreamingResponse(
-        io.BytesIO(output.getvalue().encode()),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename={filename}.csv"}
-    )
+    def generate_csv():
+        output = io.StringIO()
+        # Positional rows avoid DictWriter's per-row dict building and key validation
+        writer = csv.writer(output)
+        writer.writerow(fieldnames)
+        
+        for row_count, item in enumerate(itertools.chain([first_row], rows), start=1):
+            writer.writerow([_csv_value(item.get(key)) for key in fieldnames])
+            
+            if row_count % CSV_FLUSH_ROWS == 0:
+                yield output.getvalue().encode()
+                output.seek(0)
+                output.truncate(0)
+        
+        yield output.getvalue().encode()
+    
+    # Starlette iterates sync generators in a threadpool, so cursor reads stay off the event loop
+    return StreamingResponse(generate_csv(), media_type="text/csv", headers=headers)
 
 # ================================
 # REPORT TEMPLATES AND PRESETS
 # ================================
 
+# Templates are static, so the JSON body is encoded once at import time
+REPORT_TEMPLATES = [
+    {
+        "id": "weekly_summary",
+        "name": "Weekly Summary Report",
+        "description": "Comprehensive weekly overview of system activity",
+        "type": ReportType.SYSTEM_OVERVIEW,
+        "default_period_days": 7,
+        "includes": ["users", "files", "storage", "admin_activity"]
+    },
+    {
+        "id": "monthly_storage",
+        "name": "Monthly Storage Analysis",
+        "description": "Detailed storage usage and growth analysis",
+        "type": ReportType.STORAGE_USAGE,
+        "default_period_days": 30,
+        "includes": ["storage_by_user", "storage_by_type", "growth_trends"]
+    },
+    {
+        "id": "user_engagement",
+        "name": "User Engagement Report",
+        "description": "User activity and engagement metrics",
+        "type": ReportType.USER_ACTIVITY,
+        "default_period_days": 30,
+        "includes": ["active_users", "upload_patterns", "retention_metrics"]
+    },
+    {
+        "id": "security_audit",
+        "name": "Security Audit Report",
+        "description": "Security events and admin activity analysis",
+        "type": ReportType.SECURITY_AUDIT,
+        "default_period_days": 7,
+        "includes": ["admin_actions", "login_attempts", "security_events"]
+    }
+]
+
+REPORT_TEMPLATES_RESPONSE_BODY = orjson.dumps({
+    "templates": REPORT_TEMPLATES,
+    "total": len(REPORT_TEMPLATES)
+})
+
 @router.get("/reports/templates")
 async def get_report_templates(
     request: Request,
@@ -769,50 +1082,12 @@ async def get_report_templates(
 ):
     """Get available report templates and presets"""
     
-    templates = [
-        {
-            "id": "weekly_summary",
-            "name": "Weekly Summary Report",
-            "description": "Comprehensive weekly overview of system activity",
-            "type": ReportType.SYSTEM_OVERVIEW,
-            "default_period_days": 7,
-            "includes": ["users", "files", "storage", "admin_activity"]
-        },
-        {
-            "id": "monthly_storage",
-            "name": "Monthly Storage Analysis",
-            "description": "Detailed storage usage and growth analysis",
-            "type": ReportType.STORAGE_USAGE,
-            "default_period_days": 30,
-            "includes": ["storage_by_user", "storage_by_type", "growth_trends"]
-        },
-        {
-            "id": "user_engagement",
-            "name": "User Engagement Report",
-            "description": "User activity and engagement metrics",
-            "type": ReportType.USER_ACTIVITY,
-            "default_period_days": 30,
-            "includes": ["active_users", "upload_patterns", "retention_metrics"]
-        },
-        {
-            "id": "security_audit",
-            "name": "Security Audit Report",
-            "description": "Security events and admin activity analysis",
-            "type": ReportType.SECURITY_AUDIT,
-            "default_period_days": 7,
-            "includes": ["admin_actions", "login_attempts", "security_events"]
-        }
-    ]
-    
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_report_templates",
-        details=f"Viewed {len(templates)} report templates",
+        details=f"Viewed {len(REPORT_TEMPLATES)} report templates",
         ip_address=get_client_ip(request),
         endpoint="/api/v1/admin/reports/templates"
     )
     
-    return {
-        "templates": templates,
-        "total": len(templates)
-    }
\ No newline at end of file
+    return Response(content=REPORT_TEMPLATES_RESPONSE_BODY, media_type="application/json")
\ No newline at end of file
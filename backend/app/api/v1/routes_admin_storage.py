@@ -1,13 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta, timezone
-from pydantic import BaseModel
-import json
+from pydantic import BaseModel, validator
+from pymongo import DeleteMany, UpdateMany
+import asyncio
+import logging
+import math
+import orjson
+import time
 
 from app.services.admin_auth_service import (
     get_current_admin,
-    log_admin_activity,
-    get_client_ip,
+    queue_admin_activity,
+    client_ip,
 )
 from app.models.admin import AdminUserInDB
 from app.db.mongodb import db
@@ -16,8 +22,10 @@ from app.services.google_drive_account_service import (
     GoogleDriveAccountService,
 )
 from app.models.google_drive_account import GoogleDriveAccountCreate
+from app.services.storage_service import StorageService
 
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
 
 # Pydantic models for storage management
 class GoogleDriveAccountInfo(BaseModel):
@@ -35,90 +43,187 @@ class StorageQuotaUpdate(BaseModel):
     quota_limit: int  # in bytes
     warning_threshold: float = 0.8  # percentage (0.8 = 80%)
 
+LOAD_BALANCING_ALGORITHMS = frozenset({"round_robin", "least_used", "performance_based"})
+
 class LoadBalancingConfig(BaseModel):
     algorithm: str  # 'round_robin', 'least_used', 'performance_based'
     weight_factors: Dict[str, float]
     enable_auto_failover: bool = True
 
+    @validator('algorithm')
+    def validate_algorithm(cls, v):
+        if v not in LOAD_BALANCING_ALGORITHMS:
+            raise ValueError(f"Invalid algorithm. Must be one of: {', '.join(sorted(LOAD_BALANCING_ALGORITHMS))}")
+        return v
+
+    @validator('weight_factors')
+    def validate_weight_factors(cls, v):
+        # fsum is exact for these few floats, so 0.1 + 0.2 + 0.3 + 0.4 is not off by drift
+        if not math.isclose(math.fsum(v.values()), 1.0, abs_tol=1e-6):
+            raise ValueError("Weight factors must sum to 1.0")
+        return v
+
+# Real service account keys are ~2.5 KB; anything past this is rejected unparsed
+SERVICE_ACCOUNT_KEY_MAX_LENGTH = 64 * 1024
+
 class AccountCredentials(BaseModel):
     service_account_key: str  # JSON string of service account key
     account_email: str
     account_alias: str
 
+# GoogleDriveAccountResponse fields dumped straight from the account for list rows;
+# the formatted sizes and percentage are filled in alongside them
+_ACCOUNT_FIELDS = frozenset({
+    "account_id", "email", "alias", "is_active", "storage_used", "storage_quota",
+    "files_count", "last_activity", "health_status", "performance_score",
+    "created_at", "updated_at", "folder_id", "folder_name", "folder_path",
+})
+
+# ================================
+# ACCOUNT STATISTICS CACHE
+# ================================
+
+# Dashboard pollers hit the accounts list and combined-stats every few seconds;
+# cache the aggregated statistics so concurrent polls share one Mongo read
+ACCOUNT_STATS_CACHE_TTL_SECONDS = 30
+_stats_cache: Dict[str, Any] = {"value": None, "expires": 0.0}
+_stats_cache_lock = asyncio.Lock()
+
+async def _cached_account_statistics(ttl: int = ACCOUNT_STATS_CACHE_TTL_SECONDS) -> Dict[str, Any]:
+    """Return the account statistics, cached for ttl seconds"""
+    if time.monotonic() < _stats_cache["expires"]:
+        return _stats_cache["value"]
+
+    async with _stats_cache_lock:
+        # Another request may have refreshed the cache while we waited for the lock
+        if time.monotonic() < _stats_cache["expires"]:
+            return _stats_cache["value"]
+        stats = await GoogleDriveAccountService.get_account_statistics()
+        _cache_account_statistics(stats, ttl)
+        return stats
+
+def _cache_account_statistics(stats: Dict[str, Any], ttl: int = ACCOUNT_STATS_CACHE_TTL_SECONDS) -> None:
+    """Seed the cache with statistics that were read fresh elsewhere"""
+    _stats_cache["value"] = stats
+    _stats_cache["expires"] = time.monotonic() + ttl
+
+def _invalidate_account_statistics() -> None:
+    """Drop cached statistics after an account write"""
+    _stats_cache["expires"] = 0.0
+
+# ================================
+# PER-ACCOUNT QUOTA REFRESH
+# ================================
+
+# Detail views, health checks and manual refreshes all probe the Drive API for one
+# account; concurrent admins share one in-flight probe, and a probe that finished
+# within the cooldown is not repeated
+QUOTA_REFRESH_COOLDOWN_SECONDS = 60
+_quota_inflight: Dict[str, asyncio.Task] = {}
+_quota_last_ok: Dict[str, float] = {}
+
+async def _refresh_account_quota_once(account):
+    """Refresh one account's quota unless it was refreshed within the cooldown.
+
+    Returns the refreshed account object; when the refresh is skipped or joined,
+    the caller's own account (or the one refreshed by the in-flight probe) is returned.
+    """
+    account_id = account.account_id
+    last_ok = _quota_last_ok.get(account_id)
+    if last_ok is not None and time.monotonic() - last_ok < QUOTA_REFRESH_COOLDOWN_SECONDS:
+        return account
+
+    task = _quota_inflight.get(account_id)
+    if task is None:
+        async def _refresh():
+            try:
+                refreshed = await asyncio.to_thread(GoogleDriveAccountService._update_account_quota_sync, account)
+                # A failed probe is recorded as an error by the helper and must not start the cooldown
+                if refreshed:
+                    _quota_last_ok[account_id] = time.monotonic()
+                return account
+            finally:
+                _quota_inflight.pop(account_id, None)
+
+        task = asyncio.create_task(_refresh())
+        _quota_inflight[account_id] = task
+    # Shielded so one disconnecting client does not cancel the probe for the others
+    return await asyncio.shield(task)
+
+def _now_ts() -> int:
+    """Current Unix time in seconds, used for response metadata timestamps"""
+    return int(time.time())
+
+# Account data older than this (15 minutes) is reported stale and triggers a refresh
+ACCOUNT_DATA_STALE_SECONDS = 900
+
+def _account_row(acc, data_freshness: str) -> Dict[str, Any]:
+    """Build one accounts-list row, with folder info and a freshness indicator"""
+    # Datetimes are left as datetime objects; orjson serializes them natively
+    response_data = acc.model_dump(include=_ACCOUNT_FIELDS)
+    response_data["storage_used_formatted"] = GoogleDriveAccountService.format_storage_size(acc.storage_used)
+    response_data["storage_quota_formatted"] = GoogleDriveAccountService.format_storage_size(acc.storage_quota)
+    response_data["storage_percentage"] = (acc.storage_used / acc.storage_quota * 100) if acc.storage_quota > 0 else 0
+    
+    response_data["folder_info"] = {
+        "folder_id": acc.folder_id,
+        "folder_name": acc.folder_name or "Root",
+        "folder_path": acc.folder_path or "/",
+    }
+    # Stored as naive UTC; tag it so the client converts to its own local time
+    response_data["last_quota_check"] = acc.last_quota_check.replace(tzinfo=timezone.utc) if acc.last_quota_check else None
+    # Computed by Mongo against the same threshold as the header cache
+    response_data["data_freshness"] = data_freshness
+    return response_data
+
 @router.get("/storage/google-drive/accounts")
 async def list_google_drive_accounts(
-    request: Request,
+    ip: str = Depends(client_ip),
     refresh: bool = Query(False, description="Force refresh from Google Drive API"),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
-    """List all Google Drive accounts with their status and usage (smart cached data)."""
+    """List all Google Drive accounts with their status and usage (smart cached data).
 
-    # Fetch accounts from DB
-    accounts = await GoogleDriveAccountService.get_all_accounts()
+    cache_info.last_updated is a Unix timestamp in seconds.
+    """
+
+    # Fetch accounts and their aggregated statistics from DB
+    accounts, stats, freshness = await GoogleDriveAccountService.get_accounts_with_stats(ACCOUNT_DATA_STALE_SECONDS)
     
     # Smart caching logic: Only refresh if explicitly requested or if data is very stale (>15 minutes)
-    cache_expiry_seconds = 900  # 15 minutes
+    cache_expiry_seconds = ACCOUNT_DATA_STALE_SECONDS
     needs_refresh = refresh
     cache_status = "fresh"
     
     if not refresh:
-        # Check if any account data is stale using consistent timezone handling
-        current_time = datetime.now()
+        # Check if any account data is stale; last_quota_check is stored as naive UTC
+        now_ts = datetime.now(timezone.utc).timestamp()
         for account in accounts:
-            if account.last_quota_check:
-                # Convert UTC timestamp to local time for consistent comparison
-                local_quota_check = account.last_quota_check.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
-                time_diff = (current_time - local_quota_check).total_seconds()
-                if time_diff > cache_expiry_seconds:
-                    needs_refresh = True
-                    cache_status = "stale"
-                    break
+            if account.last_quota_check and (now_ts - account.last_quota_check.replace(tzinfo=timezone.utc).timestamp()) > cache_expiry_seconds:
+                needs_refresh = True
+                cache_status = "stale"
+                break
     
     # Perform refresh if needed
     if needs_refresh:
         try:
-            for account in accounts:
-                if account.is_active:
-                    try:
-                        await GoogleDriveAccountService._update_account_quota(account)
-                    except Exception as e:
-                        print(f"Failed to refresh account {account.account_id}: {e}")
+            active_accounts = [account for account in accounts if account.is_active]
+            results = await GoogleDriveAccountService.refresh_accounts_quota(active_accounts)
+            for account, result in zip(active_accounts, results):
+                if isinstance(result, Exception):
+                    logger.warning("Failed to refresh account %s: %s", account.account_id, result)
             
             # Re-fetch accounts after refresh
-            accounts = await GoogleDriveAccountService.get_all_accounts()
+            accounts, stats, freshness = await GoogleDriveAccountService.get_accounts_with_stats(ACCOUNT_DATA_STALE_SECONDS)
             cache_status = "fresh"
         except Exception as e:
-            print(f"Error during bulk refresh: {e}")
+            logger.error("Error during bulk refresh: %s", e)
             cache_status = "error"
 
-    account_responses = []
-    for acc in accounts:
-        response_data = GoogleDriveAccountService.to_response_model(acc).dict()
-        
-        # Add folder information and freshness indicator
-        response_data["folder_info"] = {
-            "folder_id": acc.folder_id,
-            "folder_name": acc.folder_name or "Root",
-            "folder_path": acc.folder_path or "/",
-        }
-        # Fix: Use consistent local time for all timestamp calculations
-        if acc.last_quota_check:
-            # Convert UTC timestamp to local time for consistent display
-            local_quota_check = acc.last_quota_check.replace(tzinfo=timezone.utc).astimezone().replace(tzinfo=None)
-            response_data["last_quota_check"] = local_quota_check.isoformat()
-            
-            # Calculate data freshness using local time - use same threshold as header cache (15 minutes)
-            current_time = datetime.now()
-            time_diff = (current_time - local_quota_check).total_seconds()
-            response_data["data_freshness"] = "fresh" if time_diff < 900 else "stale"  # 15 minutes = 900 seconds (same as cache_expiry_seconds)
-        else:
-            response_data["last_quota_check"] = None
-            response_data["data_freshness"] = "stale"
-        
-        account_responses.append(response_data)
+    account_responses = [_account_row(acc, freshness.get(acc.account_id, "stale")) for acc in accounts]
 
     # Aggregated statistics
-    stats = await GoogleDriveAccountService.get_account_statistics()
+    _cache_account_statistics(stats)
     statistics = {
         "total_accounts": len(accounts),
         "active_accounts": stats.get("active_accounts", 0),
@@ -127,11 +232,11 @@ async def list_google_drive_accounts(
         "average_performance": stats.get("average_performance", 0),
     }
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_gdrive_accounts",
         details=f"Viewed Google Drive accounts list (refresh={refresh}, cache_status={cache_status})",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint="/api/v1/admin/storage/google-drive/accounts",
     )
 
@@ -140,16 +245,40 @@ async def list_google_drive_accounts(
         "statistics": statistics,
         "cache_info": {
             "status": cache_status,
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": _now_ts(),
             "cache_expiry_seconds": cache_expiry_seconds,
             "is_forced_refresh": refresh
         }
     }
 
+# Declared before /accounts/{account_id} so "stream" is not captured as an account id
+@router.get("/storage/google-drive/accounts/stream")
+async def stream_google_drive_accounts(
+    ip: str = Depends(client_ip),
+    current_admin: AdminUserInDB = Depends(get_current_admin),
+):
+    """Stream Google Drive accounts as NDJSON, one account row per line (stored data, no refresh)."""
+
+    def generate_rows():
+        # Sync generator: StreamingResponse iterates it in the threadpool, so the
+        # cursor reads stay off the event loop
+        for acc, data_freshness in GoogleDriveAccountService.iter_accounts(ACCOUNT_DATA_STALE_SECONDS):
+            yield orjson.dumps(_account_row(acc, data_freshness)) + b"\n"
+
+    queue_admin_activity(
+        admin_email=current_admin.email,
+        action="view_gdrive_accounts",
+        details="Streamed Google Drive accounts list",
+        ip_address=ip,
+        endpoint="/api/v1/admin/storage/google-drive/accounts/stream",
+    )
+
+    return StreamingResponse(generate_rows(), media_type="application/x-ndjson")
+
 @router.get("/storage/google-drive/accounts/{account_id}")
 async def get_google_drive_account_detail(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Get detailed information about a specific Google Drive account (real data)."""
@@ -160,15 +289,15 @@ async def get_google_drive_account_detail(
 
     # Ensure quota and folder info is fresh
     try:
-        await GoogleDriveAccountService._update_account_quota(account)  # type: ignore
+        account = await _refresh_account_quota_once(account)
     except Exception:
         pass
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_gdrive_account_detail",
         details=f"Viewed detailed info for Google Drive account: {account_id}",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}",
     )
 
@@ -177,7 +306,7 @@ async def get_google_drive_account_detail(
 @router.post("/storage/google-drive/accounts/{account_id}/toggle")
 async def toggle_google_drive_account(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Enable or disable a Google Drive account (real)."""
@@ -186,11 +315,11 @@ async def toggle_google_drive_account(
     if not updated:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="gdrive_account_toggle",
         details=f"Toggled Google Drive account: {account_id} -> is_active={updated.is_active}",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}/toggle",
     )
 
@@ -198,22 +327,32 @@ async def toggle_google_drive_account(
     try:
         await gdrive_pool_manager.reload_from_db()  # type: ignore
     except Exception as e:
-        print(f"[ADMIN_STORAGE] Pool reload failed after toggle: {e}")
+        logger.warning("[ADMIN_STORAGE] Pool reload failed after toggle: %s", e)
+
+    _invalidate_account_statistics()
 
     return {"message": "Account status updated", "account_id": account_id, "is_active": updated.is_active}
 
 @router.post("/storage/google-drive/accounts")
 async def add_google_drive_account(
     credentials: AccountCredentials,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Add a new Google Drive account (service account or OAuth)."""
 
-    # Validate JSON early
+    # Validate JSON early; the size cap bounds parse work before anything is parsed
+    if len(credentials.service_account_key) > SERVICE_ACCOUNT_KEY_MAX_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Service account key is too large"
+        )
     try:
-        json.loads(credentials.service_account_key)
-    except json.JSONDecodeError:
+        service_account_info = orjson.loads(credentials.service_account_key)
+    except orjson.JSONDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON format for service account key"
+        )
+    if not isinstance(service_account_info, dict):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON format for service account key"
         )
@@ -224,18 +363,19 @@ async def add_google_drive_account(
                 email=credentials.account_email,
                 alias=credentials.account_alias,
                 service_account_key=credentials.service_account_key,
-            )
+            ),
+            service_account_info=service_account_info,
         )
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to add account: {e}")
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="add_gdrive_account",
         details=f"Added new Google Drive account: {credentials.account_alias} ({credentials.account_email})",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint="/api/v1/admin/storage/google-drive/accounts",
     )
 
@@ -243,7 +383,9 @@ async def add_google_drive_account(
     try:
         await gdrive_pool_manager.reload_from_db()  # type: ignore
     except Exception as e:
-        print(f"[ADMIN_STORAGE] Pool reload failed after add: {e}")
+        logger.warning("[ADMIN_STORAGE] Pool reload failed after add: %s", e)
+
+    _invalidate_account_statistics()
 
     return {
         "message": "Google Drive account added successfully",
@@ -255,7 +397,7 @@ async def add_google_drive_account(
 @router.delete("/storage/google-drive/accounts/{account_id}")
 async def remove_google_drive_account(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     force: bool = Query(False, description="Force removal even if account has files"),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
@@ -269,11 +411,11 @@ async def remove_google_drive_account(
     if not deleted:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Account not found")
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="remove_gdrive_account",
         details=f"Removed Google Drive account: {account_id} (force={force})",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}",
     )
 
@@ -281,20 +423,22 @@ async def remove_google_drive_account(
     try:
         await gdrive_pool_manager.reload_from_db()  # type: ignore
     except Exception as e:
-        print(f"[ADMIN_STORAGE] Pool reload failed after remove: {e}")
+        logger.warning("[ADMIN_STORAGE] Pool reload failed after remove: %s", e)
+
+    _invalidate_account_statistics()
 
     return {"message": f"Google Drive account {account_id} removed successfully"}
 
 @router.post("/storage/google-drive/accounts/{account_id}/delete-all-files")
 async def delete_all_files_from_account(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Delete all files from a specific Google Drive account folder"""
     
     try:
-        print(f"🗑️ [DELETE_ALL_FILES] Starting deletion for account: {account_id}")
+        logger.info("[DELETE_ALL_FILES] Starting deletion for account: %s", account_id)
         
         # Get the account
         account = await GoogleDriveAccountService.get_account_by_id(account_id)
@@ -305,23 +449,27 @@ async def delete_all_files_from_account(
         result = await GoogleDriveAccountService.delete_all_files_in_account_folder(account)
         
         # Also soft-delete all related files in MongoDB for this account
-        soft_delete_result = db.files.update_many(
+        soft_delete_result = await asyncio.to_thread(
+            db.files.update_many,
             {"gdrive_account_id": account_id, "deleted_at": {"$exists": False}},
             {"$set": {
-                "deleted_at": datetime.now(),
+                "deleted_at": datetime.utcnow(),
                 "status": "deleted", 
                 "deleted_by": current_admin.email,
                 "deletion_reason": f"bulk_delete_account_{account_id}"
             }}
         )
         
-        print(f"🗑️ [DELETE_ALL_FILES] Account {account_id}: GDrive deleted={result.get('deleted', 0)}, MongoDB soft-deleted={soft_delete_result.modified_count}")
+        logger.info(
+            "[DELETE_ALL_FILES] Account %s: GDrive deleted=%s, MongoDB soft-deleted=%s",
+            account_id, result.get("deleted", 0), soft_delete_result.modified_count,
+        )
         
-        await log_admin_activity(
+        queue_admin_activity(
             admin_email=current_admin.email,
             action="delete_all_account_files",
             details=f"Deleted all files from Google Drive account {account_id}. GDrive: {result.get('deleted', 0)} files, MongoDB: {soft_delete_result.modified_count} records",
-            ip_address=get_client_ip(request),
+            ip_address=ip,
             endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}/delete-all-files",
         )
         
@@ -334,38 +482,42 @@ async def delete_all_files_from_account(
         }
         
     except Exception as e:
-        print(f"🗑️ [DELETE_ALL_FILES] Error for account {account_id}: {e}")
+        logger.error("[DELETE_ALL_FILES] Error for account %s: %s", account_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to delete files: {str(e)}")
 
 @router.post("/storage/google-drive/accounts/{account_id}/refresh-stats")
 async def refresh_account_stats(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Manually refresh stats for a specific Google Drive account"""
     
     try:
-        print(f"🔄 [REFRESH_STATS] Refreshing stats for account: {account_id}")
+        logger.info("[REFRESH_STATS] Refreshing stats for account: %s", account_id)
         
         # Get the account
         account = await GoogleDriveAccountService.get_account_by_id(account_id)
         if not account:
             raise HTTPException(status_code=404, detail="Google Drive account not found")
         
-        # Force refresh account quota and file counts from Google Drive API
-        await GoogleDriveAccountService._update_account_quota(account)
+        # Refresh account quota and file counts from Google Drive API (coalesced per account)
+        await _refresh_account_quota_once(account)
         
         # Get updated account data
         updated_account = await GoogleDriveAccountService.get_account_by_id(account_id)
+        _invalidate_account_statistics()
         
-        print(f"🔄 [REFRESH_STATS] Account {account_id} refreshed: {updated_account.files_count} files, {updated_account.storage_used} bytes")
+        logger.info(
+            "[REFRESH_STATS] Account %s refreshed: %s files, %s bytes",
+            account_id, updated_account.files_count, updated_account.storage_used,
+        )
         
-        await log_admin_activity(
+        queue_admin_activity(
             admin_email=current_admin.email,
             action="refresh_account_stats",
             details=f"Manually refreshed stats for Google Drive account {account_id}",
-            ip_address=get_client_ip(request),
+            ip_address=ip,
             endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}/refresh-stats",
         )
         
@@ -379,129 +531,120 @@ async def refresh_account_stats(
         }
         
     except Exception as e:
-        print(f"🔄 [REFRESH_STATS] Error for account {account_id}: {e}")
+        logger.error("[REFRESH_STATS] Error for account %s: %s", account_id, e)
         raise HTTPException(status_code=500, detail=f"Failed to refresh stats: {str(e)}")
 
+# Mock load balancing configuration and account loads; they never change per
+# request, so they are built (and their statistics summed) once at import time
+_LB_CONFIG = {
+    "algorithm": "least_used",
+    "weight_factors": {
+        "storage_usage": 0.4,
+        "performance_score": 0.3,
+        "response_time": 0.2,
+        "failure_rate": 0.1
+    },
+    "enable_auto_failover": True,
+    "failover_threshold": {
+        "max_failures": 5,
+        "time_window_minutes": 15,
+        "recovery_time_minutes": 30
+    },
+    "health_check_interval": 300,  # seconds
+    "updated_by": "system@directdrive.com"
+}
+
+_LB_LOADS = [
+    {
+        "account_id": "account_1",
+        "current_load": 78.5,
+        "active_uploads": 12,
+        "queue_size": 3,
+        "weight": 1.0
+    },
+    {
+        "account_id": "account_2",
+        "current_load": 45.2,
+        "active_uploads": 7,
+        "queue_size": 1,
+        "weight": 1.2
+    },
+    {
+        "account_id": "account_3",
+        "current_load": 95.8,
+        "active_uploads": 2,
+        "queue_size": 8,
+        "weight": 0.5
+    }
+]
+
+_LB_STATS = {
+    "total_active_uploads": sum(load["active_uploads"] for load in _LB_LOADS),
+    "total_queue_size": sum(load["queue_size"] for load in _LB_LOADS),
+    "average_load": sum(load["current_load"] for load in _LB_LOADS) / len(_LB_LOADS)
+}
+
 @router.get("/storage/google-drive/load-balancing")
 async def get_load_balancing_config(
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin)
 ):
     """Get current load balancing configuration"""
     
-    # Mock current configuration
-    config = {
-        "algorithm": "least_used",
-        "weight_factors": {
-            "storage_usage": 0.4,
-            "performance_score": 0.3,
-            "response_time": 0.2,
-            "failure_rate": 0.1
-        },
-        "enable_auto_failover": True,
-        "failover_threshold": {
-            "max_failures": 5,
-            "time_window_minutes": 15,
-            "recovery_time_minutes": 30
-        },
-        "health_check_interval": 300,  # seconds
-        "last_updated": datetime.now() - timedelta(days=2),
-        "updated_by": "system@directdrive.com"
-    }
-    
-    # Current account loads
-    account_loads = [
-        {
-            "account_id": "account_1",
-            "current_load": 78.5,
-            "active_uploads": 12,
-            "queue_size": 3,
-            "weight": 1.0
-        },
-        {
-            "account_id": "account_2", 
-            "current_load": 45.2,
-            "active_uploads": 7,
-            "queue_size": 1,
-            "weight": 1.2
-        },
-        {
-            "account_id": "account_3",
-            "current_load": 95.8,
-            "active_uploads": 2,
-            "queue_size": 8,
-            "weight": 0.5
-        }
-    ]
-    
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_load_balancing_config",
         details="Viewed load balancing configuration",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint="/api/v1/admin/storage/google-drive/load-balancing"
     )
     
     return {
-        "configuration": config,
-        "current_loads": account_loads,
-        "statistics": {
-            "total_active_uploads": sum(load["active_uploads"] for load in account_loads),
-            "total_queue_size": sum(load["queue_size"] for load in account_loads),
-            "average_load": sum(load["current_load"] for load in account_loads) / len(account_loads)
-        }
+        "configuration": {**_LB_CONFIG, "last_updated": datetime.now() - timedelta(days=2)},
+        "current_loads": _LB_LOADS,
+        "statistics": _LB_STATS,
     }
 
 @router.put("/storage/google-drive/load-balancing")
 async def update_load_balancing_config(
     config: LoadBalancingConfig,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin)
 ):
-    """Update load balancing configuration"""
+    """Update load balancing configuration (updated_at is a Unix timestamp in seconds)"""
     
-    # Validate configuration
-    valid_algorithms = ["round_robin", "least_used", "performance_based"]
-    if config.algorithm not in valid_algorithms:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Invalid algorithm. Must be one of: {', '.join(valid_algorithms)}"
-        )
-    
-    # Validate weight factors sum to 1.0
-    if abs(sum(config.weight_factors.values()) - 1.0) > 0.01:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Weight factors must sum to 1.0"
-        )
+    # algorithm and weight_factors are validated on LoadBalancingConfig
     
     # Mock configuration update
     # In production, this would update the actual load balancer
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="update_load_balancing",
         details=f"Updated load balancing: algorithm={config.algorithm}, auto_failover={config.enable_auto_failover}",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint="/api/v1/admin/storage/google-drive/load-balancing"
     )
     
     return {
         "message": "Load balancing configuration updated successfully",
         "configuration": config.dict(),
-        "updated_at": datetime.now(),
+        "updated_at": _now_ts(),
         "updated_by": current_admin.email
     }
 
 @router.post("/storage/google-drive/accounts/{account_id}/health-check")
 async def perform_health_check(
     account_id: str,
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
-    """Perform manual health check on a Google Drive account (real connectivity check)."""
+    """Perform manual health check on a Google Drive account (real connectivity check).
+
+    check_timestamp is a Unix timestamp in seconds.
+    """
 
     account = await GoogleDriveAccountService.get_account_by_id(account_id)
     if not account:
@@ -511,30 +654,54 @@ async def perform_health_check(
     details: Dict[str, Any] = {}
     try:
         # Try updating quota and folder meta as a health probe
-        await GoogleDriveAccountService._update_account_quota(account)  # type: ignore
+        await _refresh_account_quota_once(account)
         details["quota_check"] = "ok"
     except Exception as e:
         status_label = "unhealthy"
         details["quota_check"] = f"error: {e}"
 
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="gdrive_health_check",
         details=f"Performed health check on account {account_id}: {status_label}",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint=f"/api/v1/admin/storage/google-drive/accounts/{account_id}/health-check",
     )
 
     return {
         "account_id": account_id,
         "overall_status": status_label,
-        "check_timestamp": datetime.now(),
+        "check_timestamp": _now_ts(),
         "details": details,
     }
 
+async def _reset_file_records(hard: bool):
+    """Soft-delete (or, if hard, delete) all file records and clear batches.
+
+    The files and batches writes are independent, so both collections are
+    written concurrently. Returns the (files, batches) bulk write results.
+    """
+    if hard:
+        files_ops = [DeleteMany({})]
+    else:
+        # Mark all files as deleted and set deleted_at to now
+        files_ops = [UpdateMany(
+            {"deleted_at": {"$exists": False}},
+            {"$set": {"deleted_at": datetime.utcnow(), "status": "deleted", "deletion_reason": "reset_all_storage"}}
+        )]
+    # Also clear batches to avoid dangling references
+    files_result, batches_result = await asyncio.gather(
+        asyncio.to_thread(db.files.bulk_write, files_ops, ordered=False),
+        asyncio.to_thread(db.batches.bulk_write, [DeleteMany({})], ordered=False),
+    )
+    if hard:
+        # No file records remain, so every user's storage counters drop to zero
+        await asyncio.to_thread(StorageService.reset_user_storage_counters)
+    return files_result, batches_result
+
 @router.post("/storage/google-drive/reset-all")
 async def reset_all_storage(
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
     hard: bool = Query(False, description="If true, hard-delete all file and batch records from Mongo")
 ):
@@ -542,33 +709,46 @@ async def reset_all_storage(
     and reset all file metadata in MongoDB (soft-delete) with optional hard purge.
     """
     try:
-        # 1) Delete files from Google Drive folders for all accounts
-        gdrive_result = await GoogleDriveAccountService.delete_all_files_all_accounts()
-
-        # 2) Reset MongoDB file records
-        if hard:
-            files_deleted = db.files.delete_many({})
-            batches_deleted = db.batches.delete_many({})
-            files_marked_deleted = 0
-        else:
-            # Mark all files as deleted and set deleted_at to now
-            deleted_mark = db.files.update_many(
-                {"deleted_at": {"$exists": False}},
-                {"$set": {"deleted_at": datetime.now(), "status": "deleted", "deletion_reason": "reset_all_storage"}}
+        # 1) Delete files from Google Drive folders for all accounts and 2) reset MongoDB
+        # file records. The two touch disjoint systems, so they run concurrently; the
+        # Drive deletion makes blocking API calls, so it runs on a worker thread.
+        accounts = await GoogleDriveAccountService.get_all_accounts()
+        gdrive_result, mongo_result = await asyncio.gather(
+            asyncio.to_thread(GoogleDriveAccountService.delete_all_files_all_accounts_sync, accounts),
+            _reset_file_records(hard),
+            return_exceptions=True,
+        )
+        gdrive_failed = isinstance(gdrive_result, BaseException)
+        mongo_failed = isinstance(mongo_result, BaseException)
+        if gdrive_failed and mongo_failed:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Reset failed: Google Drive: {gdrive_result}; MongoDB: {mongo_result}",
             )
-            # Also clear batches to avoid dangling references
-            batches_deleted = db.batches.delete_many({})
-            files_deleted = None
-            files_marked_deleted = deleted_mark.modified_count
+        if gdrive_failed or mongo_failed:
+            # One side already committed, so say exactly which part of the reset happened
+            _invalidate_account_statistics()
+            raise HTTPException(
+                status_code=500,
+                detail={
+                    "message": "Reset partially failed",
+                    "gdrive": {"error": str(gdrive_result)} if gdrive_failed else gdrive_result,
+                    "mongo": {"error": str(mongo_result)} if mongo_failed else {"status": "reset", "mode": "hard" if hard else "soft"},
+                },
+            )
+        files_result, batches_deleted = mongo_result
+        files_deleted = files_result if hard else None
+        files_marked_deleted = 0 if hard else files_result.modified_count
 
         # 3) Reset account stats by forcing quota refresh
         await GoogleDriveAccountService.update_all_accounts_quota()
+        _invalidate_account_statistics()
 
-        await log_admin_activity(
+        queue_admin_activity(
             admin_email=current_admin.email,
             action="reset_all_storage",
             details=f"Reset storage and metadata. GDrive result: {gdrive_result['summary']}",
-            ip_address=get_client_ip(request),
+            ip_address=ip,
             endpoint="/api/v1/admin/storage/google-drive/reset-all",
         )
 
@@ -580,18 +760,20 @@ async def reset_all_storage(
             "batches_deleted": batches_deleted.deleted_count,
             "mode": "hard" if hard else "soft"
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Reset failed: {e}")
 
 @router.get("/storage/google-drive/combined-stats")
 async def get_combined_google_drive_stats(
-    request: Request,
+    ip: str = Depends(client_ip),
     current_admin: AdminUserInDB = Depends(get_current_admin),
 ):
     """Get combined Google Drive storage statistics for dashboard"""
     
     # Get aggregated statistics from all accounts
-    stats = await GoogleDriveAccountService.get_account_statistics()
+    stats = await _cached_account_statistics()
     
     # Calculate available storage
     total_quota = stats.get("total_storage_quota", 0)
@@ -606,34 +788,21 @@ async def get_combined_google_drive_stats(
         "total_accounts": stats.get("total_accounts", 0),
         "active_accounts": stats.get("active_accounts", 0),
         "total_storage_quota": total_quota,
-        "total_storage_quota_formatted": format_storage_size(total_quota),
+        "total_storage_quota_formatted": GoogleDriveAccountService.format_storage_size(total_quota),
         "total_storage_used": total_used,
-        "total_storage_used_formatted": format_storage_size(total_used),
+        "total_storage_used_formatted": GoogleDriveAccountService.format_storage_size(total_used),
         "available_storage": available_storage,
-        "available_storage_formatted": format_storage_size(available_storage),
+        "available_storage_formatted": GoogleDriveAccountService.format_storage_size(available_storage),
         "usage_percentage": round(usage_percentage, 1),
         "health_status": "good" if usage_percentage < 80 else "warning" if usage_percentage < 95 else "critical"
     }
     
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_gdrive_combined_stats",
         details="Viewed combined Google Drive storage statistics",
-        ip_address=get_client_ip(request),
+        ip_address=ip,
         endpoint="/api/v1/admin/storage/google-drive/combined-stats",
     )
     
     return combined_stats
-
-def format_storage_size(bytes_size: int) -> str:
-    """Format storage size in human readable format"""
-    if bytes_size < 1024:
-        return f"{bytes_size} B"
-    elif bytes_size < 1024 * 1024:
-        return f"{bytes_size / 1024:.1f} KB"
-    elif bytes_size < 1024 * 1024 * 1024:
-        return f"{bytes_size / (1024 * 1024):.1f} MB"
-    elif bytes_size < 1024 * 1024 * 1024 * 1024:
-        return f"{bytes_size / (1024 * 1024 * 1024):.1f} GB"
-    else:
-        return f"{bytes_size / (1024 * 1024 * 1024 * 1024):.1f} TB"
\ No newline at end of file
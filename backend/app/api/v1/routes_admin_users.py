@@ -1,18 +1,34 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Optional, List
-from datetime import datetime
-from app.services.admin_auth_service import get_current_admin, log_admin_activity, get_client_ip
-from app.services.auth_service import get_password_hash
+from datetime import datetime, timedelta
+from collections import Counter
+from functools import lru_cache
+from app.services.admin_auth_service import get_current_admin, queue_admin_activity, get_client_ip
+from app.services.auth_service import get_password_hash, invalidate_cached_user
 from app.models.admin import AdminUserInDB
 from app.models.user import UserInDB, UserRole
 from app.db.mongodb import db
+from app.db.indexes import run_hinted
 from pydantic import BaseModel, EmailStr
+from pymongo import UpdateOne
+import asyncio
+import bisect
+import csv
+import heapq
+import io
+import json
+import logging
 import re
+import threading
+import time
 import httpx
 from app.services.google_drive_service import gdrive_pool_manager
+from app.services.google_drive_account_service import GoogleDriveAccountService
 from app.core.config import settings
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 # Pydantic models for user management
 class UserListResponse(BaseModel):
@@ -62,6 +78,72 @@ class BulkUserActionRequest(BaseModel):
     action: str  # 'ban', 'suspend', 'activate', 'delete'
     reason: Optional[str] = None
 
+# Per bulk action: is the user already in the target state (so the update is skipped)
+BULK_ACTION_ALREADY_APPLIED = {
+    "ban": lambda u: bool(u.get("is_banned")),
+    "suspend": lambda u: bool(u.get("is_suspended")) and not u.get("is_banned"),
+    "activate": lambda u: not u.get("is_banned") and not u.get("is_suspended"),
+    "delete": lambda u: bool(u.get("is_deleted")),
+}
+# The same conditions as write filters, so a user whose state changed after the
+# prefetch is not overwritten
+BULK_ACTION_PENDING_FILTERS = {
+    "ban": {"is_banned": {"$ne": True}},
+    "suspend": {"$or": [{"is_suspended": {"$ne": True}}, {"is_banned": True}]},
+    "activate": {"$or": [{"is_banned": True}, {"is_suspended": True}]},
+    "delete": {"is_deleted": {"$ne": True}},
+}
+
+# Whether the files collection exists; the collection set is static at runtime, so
+# listCollections is re-run at most once per TTL instead of on every request
+FILES_COLLECTION_CHECK_TTL_SECONDS = 60
+_files_collection_cache = {"exists": False, "expires_at": 0.0}
+
+async def _files_collection_exists() -> bool:
+    now = time.monotonic()
+    if now >= _files_collection_cache["expires_at"]:
+        names = await asyncio.to_thread(db.list_collection_names, filter={"name": "files"})
+        _files_collection_cache["exists"] = "files" in names
+        _files_collection_cache["expires_at"] = now + FILES_COLLECTION_CHECK_TTL_SECONDS
+    return _files_collection_cache["exists"]
+
+# File count and total size per user, joined from files (owner_id is the user's _id).
+# A missing files collection simply yields no rows, so both default to 0.
+# The sub-pipeline reads only owner_id/size_bytes, so the (owner_id, size_bytes)
+# index covers it and no file documents are fetched.
+USER_FILE_STATS_LOOKUP = {"$lookup": {
+    "from": "files",
+    "localField": "_id",
+    "foreignField": "owner_id",
+    "as": "_file_stats",
+    "pipeline": [
+        {"$project": {"_id": 0, "owner_id": 1, "size_bytes": 1}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "size": {"$sum": "$size_bytes"}}},
+    ],
+}}
+USER_FILE_STATS_FIELDS = [
+    {"$addFields": {
+        "files_count": {"$ifNull": [{"$arrayElemAt": ["$_file_stats.count", 0]}, 0]},
+        "storage_used": {"$ifNull": [{"$arrayElemAt": ["$_file_stats.size", 0]}, 0]},
+    }},
+    {"$project": {"hashed_password": 0, "_file_stats": 0}},
+]
+
+# list_users filter fragments, built once (PyMongo does not mutate filter documents)
+USER_ROLE_FILTERS = frozenset({"regular", "admin", "superadmin"})
+# Users who are neither suspended nor banned ($ne also matches a missing field)
+ACTIVE_USER_FILTER = {"is_suspended": {"$ne": True}, "is_banned": {"$ne": True}}
+USER_STATUS_FILTERS = {
+    "active": ACTIVE_USER_FILTER,
+    "suspended": {"is_suspended": True},
+    "banned": {"is_banned": True},
+}
+
+@lru_cache(maxsize=1024)
+def _email_prefix_pattern(search: str) -> str:
+    """Anchored, escaped regex for an email prefix search; admins repeat the same terms while paging"""
+    return "^" + re.escape(search)
+
 @router.get("/users", response_model=UserListResponse)
 async def list_users(
     request: Request,
@@ -81,47 +163,54 @@ async def list_users(
     
     # Search filter
     if search:
+        # Prefix-anchored email match plus exact _id equality, so both branches can use an index
         query["$or"] = [
-            {"email": {"$regex": re.escape(search), "$options": "i"}},
-            {"_id": {"$regex": re.escape(search), "$options": "i"}}
+            {"email": {"$regex": _email_prefix_pattern(search), "$options": "i"}},
+            {"_id": search}
         ]
     
     # Role filter
-    if role and role in ["regular", "admin", "superadmin"]:
+    if role in USER_ROLE_FILTERS:
         query["role"] = role
     
     # Status filter
-    if status:
-        if status == "active":
-            query["$or"] = [
-                {"is_suspended": {"$ne": True}},
-                {"is_banned": {"$ne": True}},
-                {"is_suspended": {"$exists": False}},
-                {"is_banned": {"$exists": False}}
-            ]
-        elif status == "suspended":
-            query["is_suspended"] = True
-        elif status == "banned":
-            query["is_banned"] = True
-    
-    # Get total count
-    total = db.users.count_documents(query)
+    if status in USER_STATUS_FILTERS:
+        query.update(USER_STATUS_FILTERS[status])
     
     # Calculate pagination
     skip = (page - 1) * limit
-    total_pages = (total + limit - 1) // limit
     
     # Build sort
     sort_direction = 1 if sort_order == "asc" else -1
     sort_field = sort_by if sort_by in ["email", "role", "created_at", "last_login"] else "created_at"
     
-    # Get users
-    users_cursor = db.users.find(
-        query,
-        {"hashed_password": 0}  # Exclude password hash
-    ).sort(sort_field, sort_direction).skip(skip).limit(limit)
-    
-    users = list(users_cursor)
+    # Get users with their file statistics in one aggregation instead of two
+    # queries per user
+    page_stages = [
+        {"$sort": {sort_field: sort_direction}},
+        {"$skip": skip},
+        {"$limit": limit},
+        USER_FILE_STATS_LOOKUP,
+        *USER_FILE_STATS_FIELDS,
+    ]
+    if query:
+        # Filtered: the page and the total come back from one $facet over the matched users
+        pipeline = [
+            {"$match": query},
+            {"$facet": {"users": page_stages, "total": [{"$count": "n"}]}},
+        ]
+        result = await asyncio.to_thread(lambda: next(db.users.aggregate(pipeline)))
+        users = result["users"]
+        total = result["total"][0]["n"] if result["total"] else 0
+    else:
+        # Unfiltered dashboard view: the total is the collection metadata count (can be
+        # briefly stale after an unclean shutdown), and the page sort stays index-backed,
+        # which it would not be inside a $facet
+        total, users = await asyncio.gather(
+            asyncio.to_thread(db.users.estimated_document_count),
+            asyncio.to_thread(lambda: list(db.users.aggregate(page_stages)))
+        )
+    total_pages = (total + limit - 1) // limit
     
     # Add computed fields and convert ObjectId to string
     for user in users:
@@ -129,34 +218,11 @@ async def list_users(
         if "_id" in user and hasattr(user["_id"], "__str__"):
             user["_id"] = str(user["_id"])
         
-        # Get user file statistics using correct owner_id field
-        user_id = user["_id"]
-        if "files" in db.list_collection_names():
-            # Count files owned by this user
-            files_count = db.files.count_documents({"owner_id": user_id})
-            
-            # Calculate real storage usage from file sizes
-            storage_pipeline = [
-                {"$match": {"owner_id": user_id}},
-                {"$group": {
-                    "_id": None,
-                    "total_size": {"$sum": "$size_bytes"}
-                }}
-            ]
-            storage_result = list(db.files.aggregate(storage_pipeline))
-            storage_used = storage_result[0]["total_size"] if storage_result else 0
-        else:
-            files_count = 0
-            storage_used = 0
-            
-        user["files_count"] = files_count
-        user["storage_used"] = storage_used
-        
         # Add status
         user["status"] = "banned" if user.get("is_banned") else "suspended" if user.get("is_suspended") else "active"
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="list_users",
         details=f"Listed users with search='{search}', role='{role}', status='{status}'",
@@ -180,7 +246,13 @@ async def get_user_detail(
 ):
     """Get detailed user information"""
     
-    user = db.users.find_one({"email": user_email}, {"hashed_password": 0})
+    pipeline = [
+        {"$match": {"email": user_email}},
+        {"$limit": 1},
+        USER_FILE_STATS_LOOKUP,
+        *USER_FILE_STATS_FIELDS,
+    ]
+    user = await asyncio.to_thread(lambda: next(db.users.aggregate(pipeline), None))
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -191,36 +263,17 @@ async def get_user_detail(
     if "_id" in user and hasattr(user["_id"], "__str__"):
         user["_id"] = str(user["_id"])
     
-    # Get user statistics using correct owner_id field
-    user_id = user["_id"]
-    if "files" in db.list_collection_names():
-        # Count files owned by this user
-        files_count = db.files.count_documents({"owner_id": user_id})
-        
-        # Calculate real storage usage from file sizes
-        storage_pipeline = [
-            {"$match": {"owner_id": user_id}},
-            {"$group": {
-                "_id": None,
-                "total_size": {"$sum": "$size_bytes"}
-            }}
-        ]
-        storage_result = list(db.files.aggregate(storage_pipeline))
-        storage_used = storage_result[0]["total_size"] if storage_result else 0
-    else:
-        files_count = 0
-        storage_used = 0
+    files_count = user["files_count"]
+    storage_used = user["storage_used"]
     
     # Get last activity (mock for now)
     last_activity = user.get("last_login")
     
     # Add computed fields
-    user["files_count"] = files_count
-    user["storage_used"] = storage_used
     user["status"] = "banned" if user.get("is_banned") else "suspended" if user.get("is_suspended") else "active"
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_user_detail",
         details=f"Viewed user details for: {user_email}",
@@ -235,6 +288,29 @@ async def get_user_detail(
         last_activity=last_activity
     )
 
+# Fields of a files document that the user file list returns or derives from
+USER_FILE_LIST_FIELDS = {
+    "_id": 1, "filename": 1, "size_bytes": 1, "upload_date": 1,
+    "status": 1, "content_type": 1, "storage_location": 1,
+}
+
+# File type by top-level MIME type, then by keyword anywhere in the content type
+_MEDIA_FILE_TYPES = {"image": "image", "video": "video", "audio": "audio"}
+_DOCUMENT_MARKERS = ("pdf", "document", "text")
+_ARCHIVE_MARKERS = ("zip", "rar", "7z", "tar", "gzip")
+
+@lru_cache(maxsize=256)
+def _file_type_for(content_type: str) -> str:
+    """Classify a content type; cached since a page of files repeats a handful of types"""
+    head, slash, _ = content_type.partition("/")
+    if slash and head in _MEDIA_FILE_TYPES:
+        return _MEDIA_FILE_TYPES[head]
+    if any(marker in content_type for marker in _DOCUMENT_MARKERS):
+        return "document"
+    if any(marker in content_type for marker in _ARCHIVE_MARKERS):
+        return "archive"
+    return "other"
+
 @router.get("/users/{user_email}/files", response_model=UserFileResponse)
 async def get_user_files(
     user_email: str,
@@ -243,12 +319,13 @@ async def get_user_files(
     limit: int = Query(20, ge=1, le=100),
     sort_by: Optional[str] = Query("upload_date"),
     sort_order: Optional[str] = Query("desc"),
+    format: str = Query("pretty", pattern="^(pretty|raw)$"),  # 'raw' skips display formatting
     current_admin: AdminUserInDB = Depends(get_current_admin)
 ):
     """Get files uploaded by a specific user"""
     
     # Find user
-    user = db.users.find_one({"email": user_email}, {"_id": 1, "email": 1})
+    user = await asyncio.to_thread(db.users.find_one, {"email": user_email}, {"_id": 1, "email": 1})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -258,7 +335,7 @@ async def get_user_files(
     user_id = user["_id"]
     
     # Check if files collection exists
-    if "files" not in db.list_collection_names():
+    if not await _files_collection_exists():
         return UserFileResponse(
             files=[],
             total=0,
@@ -271,20 +348,30 @@ async def get_user_files(
     # Build query for user's files
     query = {"owner_id": user_id}
     
-    # Get total count
-    total = db.files.count_documents(query)
-    
     # Calculate pagination
     skip = (page - 1) * limit
-    total_pages = (total + limit - 1) // limit
     
     # Build sort
     sort_direction = 1 if sort_order == "asc" else -1
     sort_field = sort_by if sort_by in ["filename", "size_bytes", "upload_date", "status"] else "upload_date"
     
-    # Get files
-    files_cursor = db.files.find(query, {"hashed_password": 0}).sort(sort_field, sort_direction).skip(skip).limit(limit)
-    files = list(files_cursor)
+    # Get the page of files and the total count in one round trip
+    pipeline = [
+        {"$match": query},
+        {"$facet": {
+            "files": [
+                {"$sort": {sort_field: sort_direction}},
+                {"$skip": skip},
+                {"$limit": limit},
+                {"$project": USER_FILE_LIST_FIELDS},
+            ],
+            "total": [{"$count": "n"}],
+        }},
+    ]
+    result = await asyncio.to_thread(lambda: next(db.files.aggregate(pipeline)))
+    files = result["files"]
+    total = result["total"][0]["n"] if result["total"] else 0
+    total_pages = (total + limit - 1) // limit
     
     # Enrich files with additional data and convert ObjectId to string
     for file_doc in files:
@@ -292,32 +379,12 @@ async def get_user_files(
         if "_id" in file_doc and hasattr(file_doc["_id"], "__str__"):
             file_doc["_id"] = str(file_doc["_id"])
         # Add file type based on MIME type
-        content_type = file_doc.get("content_type", "")
-        if content_type.startswith("image/"):
-            file_doc["file_type"] = "image"
-        elif content_type.startswith("video/"):
-            file_doc["file_type"] = "video"
-        elif content_type.startswith("audio/"):
-            file_doc["file_type"] = "audio"
-        elif any(x in content_type for x in ["pdf", "document", "text"]):
-            file_doc["file_type"] = "document"
-        elif any(x in content_type for x in ["zip", "rar", "7z", "tar", "gzip"]):
-            file_doc["file_type"] = "archive"
-        else:
-            file_doc["file_type"] = "other"
+        file_doc["file_type"] = _file_type_for(file_doc.get("content_type") or "")
+        if format == "raw":
+            continue
         
-        # Format size for display
-        size_bytes = file_doc.get("size_bytes", 0)
-        if size_bytes == 0:
-            file_doc["size_formatted"] = "0 B"
-        elif size_bytes < 1024:
-            file_doc["size_formatted"] = f"{size_bytes} B"
-        elif size_bytes < 1024*1024:
-            file_doc["size_formatted"] = f"{size_bytes/1024:.1f} KB"
-        elif size_bytes < 1024*1024*1024:
-            file_doc["size_formatted"] = f"{size_bytes/(1024*1024):.1f} MB"
-        else:
-            file_doc["size_formatted"] = f"{size_bytes/(1024*1024*1024):.1f} GB"
+        # Format size for display (unit picked from bit_length, no comparison ladder)
+        file_doc["size_formatted"] = GoogleDriveAccountService.format_storage_size(file_doc.get("size_bytes") or 0)
         
         # Format upload date
         upload_date = file_doc.get("upload_date")
@@ -327,7 +394,7 @@ async def get_user_files(
             file_doc["upload_date_formatted"] = "Unknown"
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_user_files",
         details=f"Viewed files for user: {user_email} (page {page})",
@@ -344,31 +411,41 @@ async def get_user_files(
         user_email=user_email
     )
 
-@router.get("/files/{file_id}/storage-insights", response_model=FileStorageInsights)
-async def get_file_storage_insights(
-    file_id: str,
-    request: Request,
-    current_admin: AdminUserInDB = Depends(get_current_admin)
-):
-    """Get detailed storage insights for a specific file"""
-    
-    # Find the file
-    file_doc = db.files.find_one({"_id": file_id})
-    if not file_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="File not found"
-        )
-    
-    filename = file_doc.get("filename", "Unknown")
+# OAuth credentials per Drive account, reused until shortly before the access token expires.
+# Keyed by (account id, refresh token) so a re-authorised account gets fresh credentials.
+GDRIVE_TOKEN_REFRESH_MARGIN = timedelta(seconds=60)
+_gdrive_credentials_cache = {}
+_gdrive_credentials_locks = {}
+
+def _gdrive_credentials(storage_account):
+    """Return OAuth credentials for a Drive account, refreshing at most once per token lifetime (blocking)"""
+    from google.auth.transport.requests import Request as GoogleRequest
+    from google.oauth2.credentials import Credentials
+    
+    key = (storage_account.id, storage_account.refresh_token)
+    # One lock per account so concurrent checks wait for a single token refresh
+    with _gdrive_credentials_locks.setdefault(key, threading.Lock()):
+        creds = _gdrive_credentials_cache.get(key)
+        if creds is None:
+            creds = Credentials(
+                token=None,
+                refresh_token=storage_account.refresh_token,
+                client_id=storage_account.client_id,
+                client_secret=storage_account.client_secret,
+                token_uri="https://oauth2.googleapis.com/token"
+            )
+            _gdrive_credentials_cache[key] = creds
+        
+        # creds.expiry is naive UTC
+        if not creds.valid or (creds.expiry and creds.expiry - GDRIVE_TOKEN_REFRESH_MARGIN <= datetime.utcnow()):
+            creds.refresh(GoogleRequest())
+        return creds
+
+def _check_gdrive(file_doc: dict) -> tuple:
+    """Check the file in Google Drive (blocking googleapiclient calls; run in a worker thread)"""
     file_status = file_doc.get("status", "unknown")
-    storage_location = file_doc.get("storage_location")
-    
-    google_drive_insights = {"exists": False, "accessible": False, "details": "Not checked"}
-    hetzner_insights = {"exists": False, "accessible": False, "details": "Not checked"}
     recommendations = []
     
-    # Check Google Drive storage
     gdrive_id = file_doc.get("gdrive_id")
     account_id = file_doc.get("gdrive_account_id")
     
@@ -379,21 +456,8 @@ async def get_file_storage_insights(
             if storage_account:
                 # Check if file exists in Google Drive
                 from googleapiclient.discovery import build
-                from google.auth.transport.requests import Request as GoogleRequest
-                from google.oauth2.credentials import Credentials
-                
-                # Create credentials
-                creds = Credentials(
-                    token=None,
-                    refresh_token=storage_account.refresh_token,
-                    client_id=storage_account.client_id,
-                    client_secret=storage_account.client_secret,
-                    token_uri="https://oauth2.googleapis.com/token"
-                )
                 
-                # Refresh token if needed
-                if not creds.valid:
-                    creds.refresh(GoogleRequest())
+                creds = _gdrive_credentials(storage_account)
                 
                 # Build service and check file
                 service = build('drive', 'v3', credentials=creds)
@@ -401,7 +465,7 @@ async def get_file_storage_insights(
                     file_metadata = service.files().get(fileId=gdrive_id, fields="id,name,size,trashed").execute()
                     
                     if file_metadata.get("trashed"):
-                        google_drive_insights = {
+                        insights = {
                             "exists": True,
                             "accessible": False,
                             "details": f"File exists in Google Drive but is in trash",
@@ -410,7 +474,7 @@ async def get_file_storage_insights(
                         }
                         recommendations.append("File is in Google Drive trash - can be restored")
                     else:
-                        google_drive_insights = {
+                        insights = {
                             "exists": True,
                             "accessible": True,
                             "details": f"File exists and is accessible in Google Drive",
@@ -421,7 +485,7 @@ async def get_file_storage_insights(
                             recommendations.append("File exists in Google Drive - update status to completed")
                 
                 except Exception as gdrive_error:
-                    google_drive_insights = {
+                    insights = {
                         "exists": False,
                         "accessible": False,
                         "details": f"Google Drive API error: {str(gdrive_error)}",
@@ -429,7 +493,7 @@ async def get_file_storage_insights(
                     }
                     recommendations.append("Google Drive file not accessible - may need re-upload")
             else:
-                google_drive_insights = {
+                insights = {
                     "exists": False,
                     "accessible": False,
                     "details": f"Google Drive account '{account_id}' not found in configuration",
@@ -438,14 +502,14 @@ async def get_file_storage_insights(
                 recommendations.append("Google Drive account configuration missing")
         
         except Exception as e:
-            google_drive_insights = {
+            insights = {
                 "exists": False,
                 "accessible": False,
                 "details": f"Error checking Google Drive: {str(e)}",
                 "account_id": account_id
             }
     else:
-        google_drive_insights = {
+        insights = {
             "exists": False,
             "accessible": False,
             "details": "No Google Drive ID or account ID in file metadata"
@@ -453,56 +517,107 @@ async def get_file_storage_insights(
         if file_status in ["failed", "uploading"]:
             recommendations.append("Missing Google Drive metadata - file upload may have failed")
     
-    # Check Hetzner storage
+    return insights, recommendations
+
+# Shared Hetzner WebDAV client so storage checks reuse a keep-alive connection
+# instead of a new TCP + TLS handshake per request; created lazily, closed on shutdown
+_hetzner_http_client: Optional[httpx.AsyncClient] = None
+
+def _hetzner_client() -> httpx.AsyncClient:
+    global _hetzner_http_client
+    if _hetzner_http_client is None or _hetzner_http_client.is_closed:
+        _hetzner_http_client = httpx.AsyncClient(
+            auth=(settings.HETZNER_USERNAME, settings.HETZNER_PASSWORD),
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=60.0)
+        )
+    return _hetzner_http_client
+
+async def close_hetzner_client() -> None:
+    """Close the shared Hetzner client (application shutdown hook)"""
+    if _hetzner_http_client is not None:
+        await _hetzner_http_client.aclose()
+
+async def _check_hetzner(file_doc: dict) -> tuple:
+    """Check the file in Hetzner storage with an HTTP HEAD"""
+    recommendations = []
+    
     hetzner_path = file_doc.get("hetzner_remote_path")
     if hetzner_path and settings.HETZNER_WEBDAV_URL:
         try:
             hetzner_url = f"{settings.HETZNER_WEBDAV_URL}/{hetzner_path}"
-            auth = (settings.HETZNER_USERNAME, settings.HETZNER_PASSWORD)
             
-            async with httpx.AsyncClient(auth=auth, timeout=10.0) as client:
-                # Use HEAD request to check existence without downloading
-                response = await client.head(hetzner_url)
-                
-                if response.status_code == 200:
-                    content_length = response.headers.get("content-length", "Unknown")
-                    hetzner_insights = {
-                        "exists": True,
-                        "accessible": True,
-                        "details": f"File exists in Hetzner storage",
-                        "file_size": content_length,
-                        "path": hetzner_path
-                    }
-                    recommendations.append("File available in Hetzner backup storage")
-                elif response.status_code == 404:
-                    hetzner_insights = {
-                        "exists": False,
-                        "accessible": False,
-                        "details": "File not found in Hetzner storage",
-                        "path": hetzner_path
-                    }
-                else:
-                    hetzner_insights = {
-                        "exists": False,
-                        "accessible": False,
-                        "details": f"Hetzner storage returned status {response.status_code}",
-                        "path": hetzner_path
-                    }
+            # Use HEAD request to check existence without downloading
+            response = await _hetzner_client().head(hetzner_url)
+            
+            if response.status_code == 200:
+                content_length = response.headers.get("content-length", "Unknown")
+                insights = {
+                    "exists": True,
+                    "accessible": True,
+                    "details": f"File exists in Hetzner storage",
+                    "file_size": content_length,
+                    "path": hetzner_path
+                }
+                recommendations.append("File available in Hetzner backup storage")
+            elif response.status_code == 404:
+                insights = {
+                    "exists": False,
+                    "accessible": False,
+                    "details": "File not found in Hetzner storage",
+                    "path": hetzner_path
+                }
+            else:
+                insights = {
+                    "exists": False,
+                    "accessible": False,
+                    "details": f"Hetzner storage returned status {response.status_code}",
+                    "path": hetzner_path
+                }
         
         except Exception as hetzner_error:
-            hetzner_insights = {
+            insights = {
                 "exists": False,
                 "accessible": False,
                 "details": f"Error checking Hetzner storage: {str(hetzner_error)}",
                 "path": hetzner_path
             }
     else:
-        hetzner_insights = {
+        insights = {
             "exists": False,
             "accessible": False,
             "details": "No Hetzner backup path in file metadata or Hetzner not configured"
         }
     
+    return insights, recommendations
+
+@router.get("/files/{file_id}/storage-insights", response_model=FileStorageInsights)
+async def get_file_storage_insights(
+    file_id: str,
+    request: Request,
+    current_admin: AdminUserInDB = Depends(get_current_admin)
+):
+    """Get detailed storage insights for a specific file"""
+    
+    # Find the file
+    file_doc = await asyncio.to_thread(db.files.find_one, {"_id": file_id})
+    if not file_doc:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="File not found"
+        )
+    
+    filename = file_doc.get("filename", "Unknown")
+    file_status = file_doc.get("status", "unknown")
+    storage_location = file_doc.get("storage_location")
+    
+    # The Drive and Hetzner checks are independent remote calls, so overlap them
+    (google_drive_insights, gdrive_recommendations), (hetzner_insights, hetzner_recommendations) = await asyncio.gather(
+        asyncio.to_thread(_check_gdrive, file_doc),
+        _check_hetzner(file_doc)
+    )
+    recommendations = gdrive_recommendations + hetzner_recommendations
+    
     # Add general recommendations based on status
     if file_status == "failed":
         if not google_drive_insights["exists"] and not hetzner_insights["exists"]:
@@ -514,7 +629,7 @@ async def get_file_storage_insights(
             recommendations.append("File found in Google Drive - update status to completed")
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="check_file_storage_insights",
         details=f"Checked storage insights for file: {filename} (ID: {file_id})",
@@ -541,13 +656,6 @@ async def update_user(
 ):
     """Update user information"""
     
-    user = db.users.find_one({"email": user_email})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Build update document
     update_doc = {}
     changes = []
@@ -570,12 +678,22 @@ async def update_user(
         update_doc["storage_quota"] = update_data.storage_quota
         changes.append(f"storage quota to {update_data.storage_quota} bytes")
     
+    # The update doubles as the existence check (matched_count), saving a find_one round trip
     if update_doc:
         update_doc["updated_at"] = datetime.utcnow()
-        db.users.update_one({"email": user_email}, {"$set": update_doc})
+        result = await asyncio.to_thread(db.users.update_one, {"email": user_email}, {"$set": update_doc})
+        user_exists = result.matched_count > 0
+    else:
+        user_exists = await asyncio.to_thread(db.users.find_one, {"email": user_email}, {"_id": 1}) is not None
+    if not user_exists:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    invalidate_cached_user(user_email)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="update_user",
         details=f"Updated user {user_email}: {', '.join(changes)}",
@@ -594,13 +712,6 @@ async def update_user_status(
 ):
     """Ban, suspend, or activate user"""
     
-    user = db.users.find_one({"email": user_email})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Prevent admins from banning themselves
     if user_email == current_admin.email:
         raise HTTPException(
@@ -608,25 +719,26 @@ async def update_user_status(
             detail="Cannot change your own status"
         )
     
-    update_doc = {"updated_at": datetime.utcnow()}
+    now = datetime.utcnow()
+    update_doc = {"updated_at": now}
     action_msg = ""
     
     if status_data.action == "ban":
         update_doc["is_banned"] = True
         update_doc["is_suspended"] = False
-        update_doc["banned_at"] = datetime.utcnow()
+        update_doc["banned_at"] = now
         update_doc["ban_reason"] = status_data.reason
         action_msg = "banned"
     elif status_data.action == "suspend":
         update_doc["is_suspended"] = True
         update_doc["is_banned"] = False
-        update_doc["suspended_at"] = datetime.utcnow()
+        update_doc["suspended_at"] = now
         update_doc["suspension_reason"] = status_data.reason
         action_msg = "suspended"
     elif status_data.action == "activate":
         update_doc["is_banned"] = False
         update_doc["is_suspended"] = False
-        update_doc["activated_at"] = datetime.utcnow()
+        update_doc["activated_at"] = now
         action_msg = "activated"
     else:
         raise HTTPException(
@@ -634,10 +746,16 @@ async def update_user_status(
             detail="Invalid action. Use 'ban', 'suspend', or 'activate'"
         )
     
-    db.users.update_one({"email": user_email}, {"$set": update_doc})
+    result = await asyncio.to_thread(db.users.update_one, {"email": user_email}, {"$set": update_doc})
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    invalidate_cached_user(user_email)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action=f"user_{status_data.action}",
         details=f"User {action_msg}: {user_email}. Reason: {status_data.reason or 'No reason provided'}",
@@ -656,18 +774,11 @@ async def reset_user_password(
 ):
     """Reset user password"""
     
-    user = db.users.find_one({"email": user_email})
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
-    # Hash new password
-    hashed_password = get_password_hash(password_data.new_password)
+    # Hash new password (CPU-bound, so off the event loop)
+    hashed_password = await asyncio.to_thread(get_password_hash, password_data.new_password)
     
-    # Update password
-    db.users.update_one(
+    # Update password; matched_count doubles as the existence check
+    result = await asyncio.to_thread(db.users.update_one,
         {"email": user_email},
         {
             "$set": {
@@ -677,9 +788,15 @@ async def reset_user_password(
             }
         }
     )
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    invalidate_cached_user(user_email)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="reset_user_password",
         details=f"Reset password for user: {user_email}",
@@ -710,30 +827,31 @@ async def bulk_user_action(
             detail="Cannot perform this action on your own account"
         )
     
-    update_doc = {"updated_at": datetime.utcnow()}
+    now = datetime.utcnow()
+    update_doc = {"updated_at": now}
     action_msg = ""
     
     if action_data.action == "ban":
         update_doc["is_banned"] = True
         update_doc["is_suspended"] = False
-        update_doc["banned_at"] = datetime.utcnow()
+        update_doc["banned_at"] = now
         update_doc["ban_reason"] = action_data.reason
         action_msg = "banned"
     elif action_data.action == "suspend":
         update_doc["is_suspended"] = True
         update_doc["is_banned"] = False
-        update_doc["suspended_at"] = datetime.utcnow()
+        update_doc["suspended_at"] = now
         update_doc["suspension_reason"] = action_data.reason
         action_msg = "suspended"
     elif action_data.action == "activate":
         update_doc["is_banned"] = False
         update_doc["is_suspended"] = False
-        update_doc["activated_at"] = datetime.utcnow()
+        update_doc["activated_at"] = now
         action_msg = "activated"
     elif action_data.action == "delete":
         # Soft delete - mark as deleted instead of actually deleting
         update_doc["is_deleted"] = True
-        update_doc["deleted_at"] = datetime.utcnow()
+        update_doc["deleted_at"] = now
         update_doc["deleted_by"] = current_admin.email
         action_msg = "deleted"
     else:
@@ -742,24 +860,41 @@ async def bulk_user_action(
             detail="Invalid action. Use 'ban', 'suspend', 'activate', or 'delete'"
         )
     
-    # Perform bulk update
-    result = db.users.update_many(
+    # Fetch all targets in one round trip and drop unknown or already-applied users
+    targets = await asyncio.to_thread(list, db.users.find(
         {"email": {"$in": action_data.user_emails}},
-        {"$set": update_doc}
-    )
+        {"email": 1, "role": 1, "is_banned": 1, "is_suspended": 1, "is_deleted": 1}
+    ))
+    found_emails = {u["email"] for u in targets}
+    not_found = [email for email in action_data.user_emails if email not in found_emails]
+    already_applied = BULK_ACTION_ALREADY_APPLIED[action_data.action]
+    skipped = [u["email"] for u in targets if already_applied(u)]
+    pending = [u["email"] for u in targets if not already_applied(u)]
+    
+    # Perform bulk update: one conditional UpdateOne per user, sent as a single unordered batch
+    modified_count = 0
+    if pending:
+        pending_filter = BULK_ACTION_PENDING_FILTERS[action_data.action]
+        ops = [UpdateOne({"email": email, **pending_filter}, {"$set": update_doc}) for email in pending]
+        result = await asyncio.to_thread(db.users.bulk_write, ops, ordered=False)
+        modified_count = result.modified_count
+        for email in pending:
+            invalidate_cached_user(email)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action=f"bulk_user_{action_data.action}",
-        details=f"Bulk {action_msg} {result.modified_count} users: {', '.join(action_data.user_emails[:10])}{'...' if len(action_data.user_emails) > 10 else ''}. Reason: {action_data.reason or 'No reason provided'}",
+        details=f"Bulk {action_msg} {modified_count} users: {', '.join(action_data.user_emails[:10])}{'...' if len(action_data.user_emails) > 10 else ''}. Reason: {action_data.reason or 'No reason provided'}",
         ip_address=get_client_ip(request),
         endpoint="/api/v1/admin/users/bulk-action"
     )
     
     return {
-        "message": f"{result.modified_count} users {action_msg} successfully",
-        "affected_count": result.modified_count
+        "message": f"{modified_count} users {action_msg} successfully",
+        "affected_count": modified_count,
+        "skipped": skipped,
+        "not_found": not_found
     }
 
 @router.get("/users/{user_email}/activity")
@@ -771,7 +906,7 @@ async def get_user_activity(
 ):
     """Get user activity timeline"""
     
-    user = db.users.find_one({"email": user_email})
+    user = await asyncio.to_thread(db.users.find_one, {"email": user_email})
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -779,15 +914,16 @@ async def get_user_activity(
         )
     
     # Mock activity data - replace with actual activity tracking
+    now = datetime.utcnow()
     activities = [
         {
-            "timestamp": datetime.utcnow(),
+            "timestamp": now,
             "action": "login",
             "details": "User logged in",
             "ip_address": "192.168.1.1"
         },
         {
-            "timestamp": datetime.utcnow(),
+            "timestamp": now,
             "action": "upload_file",
             "details": "Uploaded document.pdf",
             "ip_address": "192.168.1.1"
@@ -795,7 +931,7 @@ async def get_user_activity(
     ]
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_user_activity",
         details=f"Viewed activity for user: {user_email}",
@@ -805,35 +941,73 @@ async def get_user_activity(
     
     return {"activities": activities}
 
+# Columns of the CSV user export, in order
+USER_EXPORT_FIELDS = [
+    "_id", "email", "name", "role", "is_admin", "is_active", "is_suspended", "is_banned",
+    "is_google_user", "verified_email", "storage_limit_bytes", "storage_quota",
+    "created_at", "last_login",
+]
+# Rows per streamed export chunk (also the cursor batch size)
+USER_EXPORT_BATCH_SIZE = 1000
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+def _stream_users_csv():
+    cursor = db.users.find({}, {field: 1 for field in USER_EXPORT_FIELDS}).batch_size(USER_EXPORT_BATCH_SIZE)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(USER_EXPORT_FIELDS)
+    for count, user in enumerate(cursor, start=1):
+        writer.writerow([_export_value(user.get(field)) for field in USER_EXPORT_FIELDS])
+        if count % USER_EXPORT_BATCH_SIZE == 0:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    yield output.getvalue()
+
+def _json_export_default(value):
+    # ISO-8601 datetimes, matching the CSV export; ObjectId and anything else as str
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def _stream_users_json():
+    cursor = db.users.find({}, {"hashed_password": 0}).batch_size(USER_EXPORT_BATCH_SIZE)
+    yield '{"users": ['
+    total = 0
+    for user in cursor:
+        yield ("," if total else "") + json.dumps(user, default=_json_export_default)
+        total += 1
+    yield f'], "exported_at": {json.dumps(datetime.utcnow().isoformat())}, "total": {total}}}'
+
 @router.get("/users/export")
 async def export_users(
     request: Request,
     format: str = Query("csv", pattern="^(csv|json)$"),
     current_admin: AdminUserInDB = Depends(get_current_admin)
 ):
-    """Export user data"""
+    """Export user data, streamed from the cursor so memory stays bounded by one batch"""
     
-    users = list(db.users.find({}, {"hashed_password": 0}))
-    
-    # Convert ObjectId to string for serialization
-    for user in users:
-        if "_id" in user and hasattr(user["_id"], "__str__"):
-            user["_id"] = str(user["_id"])
+    total = await asyncio.to_thread(db.users.estimated_document_count)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="export_users",
-        details=f"Exported {len(users)} users in {format} format",
+        details=f"Exported ~{total} users in {format} format",
         ip_address=get_client_ip(request),
         endpoint="/api/v1/admin/users/export"
     )
     
+    filename = f"users_export_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.{format}"
+    headers = {"Content-Disposition": f"attachment; filename={filename}"}
+    # Starlette iterates sync generators in a threadpool, so cursor reads stay off the event loop
     if format == "json":
-        return {"users": users, "exported_at": datetime.utcnow(), "total": len(users)}
-    else:
-        # For CSV, we'll return the data and let frontend handle CSV generation
-        return {"users": users, "format": "csv", "exported_at": datetime.utcnow()}
+        return StreamingResponse(_stream_users_json(), media_type="application/json", headers=headers)
+    return StreamingResponse(_stream_users_csv(), media_type="text/csv", headers=headers)
 
 
 # USER ANALYTICS ENDPOINTS
@@ -873,6 +1047,43 @@ class UserRetentionMetrics(BaseModel):
     new_users_last_30d: int
 
 
+# Index hints for the $match-leading analytics pipelines (indexes are ensured in app.db.indexes)
+CREATED_AT_HINT = [("created_at", -1)]
+ACTIVE_LAST_LOGIN_HINT = [("is_suspended", 1), ("is_banned", 1), ("last_login", -1)]
+
+# Analytics responses are rolled up into the analytics_cache collection and served from
+# there while fresh, so dashboard reloads across admins and workers share one computation
+ANALYTICS_CACHE_TTL = timedelta(minutes=5)
+
+class _UncachedAnalytics(Exception):
+    """Raised by a compute callback to return a fallback payload that must not be cached"""
+    def __init__(self, payload: dict):
+        super().__init__("analytics fallback payload")
+        self.payload = payload
+
+async def _cached_analytics(key: str, compute) -> dict:
+    """Return the cached payload for key, recomputing (and storing) it once it is stale"""
+    now = datetime.utcnow()
+    cached = await asyncio.to_thread(db.analytics_cache.find_one, {"_id": key})
+    if cached and cached.get("computed_at") and now - cached["computed_at"] < ANALYTICS_CACHE_TTL:
+        return cached["payload"]
+    
+    # compute reuses this request timestamp rather than reading the clock again
+    try:
+        payload = await compute(now)
+    except _UncachedAnalytics as fallback:
+        # A fallback after a transient failure is served to this request only
+        return fallback.payload
+    try:
+        await asyncio.to_thread(db.analytics_cache.replace_one,
+            {"_id": key},
+            {"payload": payload, "computed_at": now},
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning("Failed to cache analytics %s: %s", key, e)
+    return payload
+
 @router.get("/analytics/registration-trends", response_model=UserRegistrationTrends)
 async def get_registration_trends(
     request: Request,
@@ -882,64 +1093,86 @@ async def get_registration_trends(
 ):
     """Get user registration trends over time"""
     
-    from datetime import timedelta
-    import calendar
-    
-    # Calculate date range
-    end_date = datetime.utcnow()
-    start_date = end_date - timedelta(days=days)
-    
-    # Build aggregation pipeline based on period
-    if period == "daily":
-        group_format = "%Y-%m-%d"
-        date_format = "$dateToString"
-    elif period == "weekly":
-        group_format = "%Y-W%V"  # Year-Week format
-        date_format = "$dateToString" 
-    else:  # monthly
-        group_format = "%Y-%m"
-        date_format = "$dateToString"
-    
-    pipeline = [
-        {
-            "$match": {
-                "created_at": {
-                    "$gte": start_date,
-                    "$lte": end_date
-                }
-            }
-        },
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": group_format,
-                        "date": "$created_at"
+    async def compute(now: datetime) -> dict:
+        # Calculate date range
+        end_date = now
+        start_date = end_date - timedelta(days=days)
+        
+        # Build aggregation pipeline based on period
+        if period == "daily":
+            group_format = "%Y-%m-%d"
+            date_format = "$dateToString"
+        elif period == "weekly":
+            group_format = "%Y-W%V"  # Year-Week format
+            date_format = "$dateToString" 
+        else:  # monthly
+            group_format = "%Y-%m"
+            date_format = "$dateToString"
+        
+        # Growth compares the last 7 days with the 7 before them, independent of the bucket size
+        recent_start = end_date - timedelta(days=7)
+        previous_start = end_date - timedelta(days=14)
+        in_range = {"$match": {"created_at": {"$gte": start_date, "$lte": end_date}}}
+        
+        pipeline = [
+            {
+                "$match": {
+                    "created_at": {
+                        "$gte": min(start_date, previous_start),
+                        "$lte": end_date
                     }
-                },
-                "count": {"$sum": 1}
+                }
+            },
+            {
+                "$facet": {
+                    "series": [
+                        in_range,
+                        {
+                            "$group": {
+                                "_id": {
+                                    "$dateToString": {
+                                        "format": group_format,
+                                        "date": "$created_at"
+                                    }
+                                },
+                                "count": {"$sum": 1}
+                            }
+                        },
+                        {"$sort": {"_id": 1}}
+                    ],
+                    "recent": [{"$match": {"created_at": {"$gte": recent_start}}}, {"$count": "n"}],
+                    "previous": [{"$match": {"created_at": {"$gte": previous_start, "$lt": recent_start}}}, {"$count": "n"}],
+                    "total": [in_range, {"$count": "n"}],
+                }
             }
-        },
-        {"$sort": {"_id": 1}}
-    ]
-    
-    # Execute aggregation
-    results = list(db.users.aggregate(pipeline))
-    
-    # Format results
-    data = [{"date": result["_id"], "count": result["count"]} for result in results]
-    total_registrations = sum(item["count"] for item in data)
-    
-    # Calculate growth rate
-    if len(data) >= 2:
-        recent_period = sum(item["count"] for item in data[-7:])  # Last week
-        previous_period = sum(item["count"] for item in data[-14:-7]) if len(data) >= 14 else 0
+        ]
+        
+        # Execute aggregation
+        facets = await asyncio.to_thread(lambda: next(run_hinted(db.users.aggregate, pipeline, hint=CREATED_AT_HINT)))
+        
+        def facet_count(name: str) -> int:
+            return facets[name][0]["n"] if facets[name] else 0
+        
+        # Format results
+        data = [{"date": result["_id"], "count": result["count"]} for result in facets["series"]]
+        total_registrations = facet_count("total")
+        
+        # Calculate growth rate
+        recent_period = facet_count("recent")
+        previous_period = facet_count("previous")
         growth_rate = ((recent_period - previous_period) / max(previous_period, 1)) * 100
-    else:
-        growth_rate = 0.0
+        
+        return {
+            "period": period,
+            "data": data,
+            "total_registrations": total_registrations,
+            "growth_rate": round(growth_rate, 2),
+        }
+    
+    payload = await _cached_analytics(f"registration_trends:{period}:{days}", compute)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_registration_trends",
         details=f"Viewed {period} registration trends for {days} days",
@@ -947,12 +1180,7 @@ async def get_registration_trends(
         endpoint="/api/v1/admin/analytics/registration-trends"
     )
     
-    return UserRegistrationTrends(
-        period=period,
-        data=data,
-        total_registrations=total_registrations,
-        growth_rate=round(growth_rate, 2)
-    )
+    return UserRegistrationTrends(**payload)
 
 
 @router.get("/analytics/active-users", response_model=ActiveUsersStats)
@@ -962,57 +1190,42 @@ async def get_active_users_stats(
 ):
     """Get active users statistics"""
     
-    from datetime import timedelta
-    
-    now = datetime.utcnow()
-    
-    # Define time periods
-    day_ago = now - timedelta(days=1)
-    week_ago = now - timedelta(days=7)
-    month_ago = now - timedelta(days=30)
-    
-    # Count active users for different periods
-    daily_active = db.users.count_documents({
-        "last_login": {"$gte": day_ago},
-        "$or": [
-            {"is_suspended": {"$ne": True}},
-            {"is_banned": {"$ne": True}},
-            {"is_suspended": {"$exists": False}},
-            {"is_banned": {"$exists": False}}
-        ]
-    })
-    
-    weekly_active = db.users.count_documents({
-        "last_login": {"$gte": week_ago},
-        "$or": [
-            {"is_suspended": {"$ne": True}},
-            {"is_banned": {"$ne": True}},
-            {"is_suspended": {"$exists": False}},
-            {"is_banned": {"$exists": False}}
-        ]
-    })
-    
-    monthly_active = db.users.count_documents({
-        "last_login": {"$gte": month_ago},
-        "$or": [
-            {"is_suspended": {"$ne": True}},
-            {"is_banned": {"$ne": True}},
-            {"is_suspended": {"$exists": False}},
-            {"is_banned": {"$exists": False}}
-        ]
-    })
-    
-    total_active = db.users.count_documents({
-        "$or": [
-            {"is_suspended": {"$ne": True}},
-            {"is_banned": {"$ne": True}},
-            {"is_suspended": {"$exists": False}},
-            {"is_banned": {"$exists": False}}
+    async def compute(now: datetime) -> dict:
+        # Define time periods
+        day_ago = now - timedelta(days=1)
+        week_ago = now - timedelta(days=7)
+        month_ago = now - timedelta(days=30)
+        
+        # Count active users for all periods in one pass over the non-suspended, non-banned users
+        pipeline = [
+            {"$match": ACTIVE_USER_FILTER},
+            {"$group": {
+                "_id": None,
+                "daily": {"$sum": {"$cond": [{"$gte": ["$last_login", day_ago]}, 1, 0]}},
+                "weekly": {"$sum": {"$cond": [{"$gte": ["$last_login", week_ago]}, 1, 0]}},
+                "monthly": {"$sum": {"$cond": [{"$gte": ["$last_login", month_ago]}, 1, 0]}},
+                "total": {"$sum": 1},
+            }},
         ]
-    })
+        counts = await asyncio.to_thread(
+            lambda: next(run_hinted(db.users.aggregate, pipeline, hint=ACTIVE_LAST_LOGIN_HINT), None)
+        ) or {}
+        daily_active = counts.get("daily", 0)
+        weekly_active = counts.get("weekly", 0)
+        monthly_active = counts.get("monthly", 0)
+        total_active = counts.get("total", 0)
+        
+        return {
+            "daily_active": daily_active,
+            "weekly_active": weekly_active,
+            "monthly_active": monthly_active,
+            "total_active": total_active,
+        }
+    
+    payload = await _cached_analytics("active_users", compute)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_active_users",
         details="Viewed active users statistics",
@@ -1020,12 +1233,7 @@ async def get_active_users_stats(
         endpoint="/api/v1/admin/analytics/active-users"
     )
     
-    return ActiveUsersStats(
-        daily_active=daily_active,
-        weekly_active=weekly_active,
-        monthly_active=monthly_active,
-        total_active=total_active
-    )
+    return ActiveUsersStats(**payload)
 
 
 @router.get("/analytics/geographic-distribution", response_model=UserGeographicData)
@@ -1049,7 +1257,7 @@ async def get_geographic_distribution(
     ]
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_geographic_distribution",
         details="Viewed user geographic distribution",
@@ -1063,6 +1271,86 @@ async def get_geographic_distribution(
     )
 
 
+# Storage analytics reads the per-user files_count / storage_used counters kept on user
+# documents (see StorageService.adjust_user_storage_counters) instead of aggregating files.
+
+# Server-side version of _storage_distribution. $bucket bounds are [lower, upper), so each
+# boundary is the inclusive limit + 1 byte; everything above 10GB lands in the default bucket.
+_MB = 1024 * 1024
+STORAGE_DISTRIBUTION_LABELS = {
+    0: "0-100MB",
+    100 * _MB + 1: "100MB-1GB",
+    1024 * _MB + 1: "1GB-10GB",
+    "10GB+": "10GB+",
+}
+STORAGE_DISTRIBUTION_BUCKET = {"$bucket": {
+    "groupBy": {"$ifNull": ["$storage_used", 0]},
+    "boundaries": [0, 100 * _MB + 1, 1024 * _MB + 1, 10240 * _MB + 1],
+    "default": "10GB+",
+    "output": {"count": {"$sum": 1}},
+}}
+# Inclusive upper limits of the first three ranges, for bucketing in Python
+STORAGE_DISTRIBUTION_LIMITS = [100 * _MB, 1024 * _MB, 10240 * _MB]
+
+def _storage_distribution(storage_values) -> List[dict]:
+    # bisect_left maps a value to the first range whose limit is >= it (past the end is 10GB+)
+    counts = Counter(bisect.bisect_left(STORAGE_DISTRIBUTION_LIMITS, value) for value in storage_values)
+    return [
+        {"range": label, "count": counts[index]}
+        for index, label in enumerate(STORAGE_DISTRIBUTION_LABELS.values())
+    ]
+
+async def _storage_usage_from_counters() -> dict:
+    # Top users is an index walk on storage_used; totals and the distribution share one pass
+    top_users, summary = await asyncio.gather(
+        asyncio.to_thread(list, db.users.find(
+            {}, {"email": 1, "files_count": 1, "storage_used": 1}
+        ).sort("storage_used", -1).limit(10)),
+        asyncio.to_thread(lambda: next(db.users.aggregate([
+            {"$facet": {
+                "totals": [{"$group": {"_id": None, "total_storage": {"$sum": "$storage_used"}, "total_users": {"$sum": 1}}}],
+                "distribution": [STORAGE_DISTRIBUTION_BUCKET],
+            }},
+        ])))
+    )
+    totals = summary["totals"][0] if summary["totals"] else {"total_storage": 0, "total_users": 0}
+    
+    for user in top_users:
+        # Convert ObjectId to string for serialization
+        user["_id"] = str(user["_id"])
+        user.setdefault("files_count", 0)
+        user.setdefault("storage_used", 0)
+    
+    bucket_counts = {row["_id"]: row["count"] for row in summary["distribution"]}
+    ranges = [
+        {"range": label, "count": bucket_counts.get(bucket_id, 0)}
+        for bucket_id, label in STORAGE_DISTRIBUTION_LABELS.items()
+    ]
+    
+    return {
+        "total_storage": totals["total_storage"],
+        "average_per_user": round(totals["total_storage"] / max(totals["total_users"], 1), 2),
+        "top_users": top_users,
+        "storage_distribution": ranges,
+    }
+
+def _storage_usage_payload(users_with_storage: List[dict]) -> dict:
+    """Build the storage-usage analytics payload from per-user storage rows"""
+    # Calculate total storage and average
+    total_storage = sum(user.get("storage_used", 0) for user in users_with_storage)
+    total_users = len(users_with_storage)
+    average_per_user = total_storage / max(total_users, 1)
+    
+    # Get top users by storage (a bounded heap rather than sorting every user)
+    top_users = heapq.nlargest(10, users_with_storage, key=lambda x: x.get("storage_used", 0))
+    
+    return {
+        "total_storage": total_storage,
+        "average_per_user": round(average_per_user, 2),
+        "top_users": top_users,
+        "storage_distribution": _storage_distribution(user.get("storage_used", 0) for user in users_with_storage),
+    }
+
 @router.get("/analytics/storage-usage", response_model=StorageUsageAnalytics)
 async def get_storage_usage_analytics(
     request: Request,
@@ -1070,46 +1358,14 @@ async def get_storage_usage_analytics(
 ):
     """Get storage usage analytics"""
     
-    try:
-        # Check if files collection exists
-        collections = db.list_collection_names()
-        
-        if "files" in collections:
-            # Get users with their file counts and storage usage
-            pipeline = [
-                {
-                    "$lookup": {
-                        "from": "files",
-                        "localField": "_id",
-                        "foreignField": "owner_id",
-                        "as": "user_files"
-                    }
-                },
-                {
-                    "$addFields": {
-                        "files_count": {"$size": "$user_files"},
-                        "storage_used": {"$sum": "$user_files.size_bytes"}  # Real storage from file sizes
-                    }
-                },
-                {
-                    "$project": {
-                        "email": 1,
-                        "files_count": 1,
-                        "storage_used": 1,
-                        "hashed_password": 0
-                    }
-                }
-            ]
-            
-            users_with_storage = list(db.users.aggregate(pipeline))
+    async def compute(now: datetime) -> dict:
+        try:
+            # Check if files collection exists
+            if await _files_collection_exists():
+                return await _storage_usage_from_counters()
             
-            # Convert ObjectId to string for serialization
-            for user in users_with_storage:
-                if "_id" in user and hasattr(user["_id"], "__str__"):
-                    user["_id"] = str(user["_id"])
-        else:
             # Mock data when files collection doesn't exist
-            users = list(db.users.find({}, {"email": 1, "hashed_password": 0}))
+            users = await asyncio.to_thread(list, db.users.find({}, {"email": 1}))
             users_with_storage = []
             for user in users:
                 # Convert ObjectId to string for serialization
@@ -1123,48 +1379,21 @@ async def get_storage_usage_analytics(
                     "files_count": mock_files,
                     "storage_used": mock_files * 1024 * 1024  # 1MB per file
                 })
-    except Exception as e:
-        # Fallback to simple mock data if anything fails
-        users_with_storage = [
-            {"email": "test1@example.com", "files_count": 25, "storage_used": 26214400},
-            {"email": "test2@example.com", "files_count": 15, "storage_used": 15728640},
-            {"email": "test3@example.com", "files_count": 35, "storage_used": 36700160},
-            {"email": "admin@directdrive.com", "files_count": 5, "storage_used": 5242880}
-        ]
-    
-    # Calculate total storage and average
-    total_storage = sum(user.get("storage_used", 0) for user in users_with_storage)
-    total_users = len(users_with_storage)
-    average_per_user = total_storage / max(total_users, 1)
-    
-    # Get top users by storage
-    top_users = sorted(
-        users_with_storage, 
-        key=lambda x: x.get("storage_used", 0), 
-        reverse=True
-    )[:10]
+        except Exception as e:
+            # Fallback to simple mock data if anything fails, without caching it
+            raise _UncachedAnalytics(_storage_usage_payload([
+                {"email": "test1@example.com", "files_count": 25, "storage_used": 26214400},
+                {"email": "test2@example.com", "files_count": 15, "storage_used": 15728640},
+                {"email": "test3@example.com", "files_count": 35, "storage_used": 36700160},
+                {"email": "admin@directdrive.com", "files_count": 5, "storage_used": 5242880}
+            ]))
+        
+        return _storage_usage_payload(users_with_storage)
     
-    # Create storage distribution ranges
-    ranges = [
-        {"range": "0-100MB", "count": 0},
-        {"range": "100MB-1GB", "count": 0},
-        {"range": "1GB-10GB", "count": 0},
-        {"range": "10GB+", "count": 0}
-    ]
-    
-    for user in users_with_storage:
-        storage_mb = user.get("storage_used", 0) / (1024 * 1024)
-        if storage_mb <= 100:
-            ranges[0]["count"] += 1
-        elif storage_mb <= 1024:
-            ranges[1]["count"] += 1
-        elif storage_mb <= 10240:
-            ranges[2]["count"] += 1
-        else:
-            ranges[3]["count"] += 1
+    payload = await _cached_analytics("storage_usage", compute)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_storage_analytics",
         details="Viewed storage usage analytics",
@@ -1172,25 +1401,10 @@ async def get_storage_usage_analytics(
         endpoint="/api/v1/admin/analytics/storage-usage"
     )
     
-    return StorageUsageAnalytics(
-        total_storage=total_storage,
-        average_per_user=round(average_per_user, 2),
-        top_users=top_users,
-        storage_distribution=ranges
-    )
+    return StorageUsageAnalytics(**payload)
 
 
-@router.get("/analytics/user-activity-patterns", response_model=UserActivityPatterns)
-async def get_user_activity_patterns(
-    request: Request,
-    days: int = Query(7, ge=1, le=30),
-    current_admin: AdminUserInDB = Depends(get_current_admin)
-):
-    """Get user activity patterns (upload/download by hour)"""
-    
-    # Mock data for activity patterns
-    # In production, you would query actual upload/download logs
-    
+def _mock_activity_patterns():
     upload_patterns = []
     download_patterns = []
     
@@ -1217,20 +1431,39 @@ async def get_user_activity_patterns(
         
         upload_patterns.append({"hour": hour, "uploads": uploads})
         download_patterns.append({"hour": hour, "downloads": downloads})
+    return upload_patterns, download_patterns
+
+# The mock hourly patterns are deterministic (int hashes are stable), so they are built once
+_MOCK_UPLOAD_PATTERNS, _MOCK_DOWNLOAD_PATTERNS = _mock_activity_patterns()
+
+@router.get("/analytics/user-activity-patterns", response_model=UserActivityPatterns)
+async def get_user_activity_patterns(
+    request: Request,
+    days: int = Query(7, ge=1, le=30),
+    current_admin: AdminUserInDB = Depends(get_current_admin)
+):
+    """Get user activity patterns (upload/download by hour)"""
     
-    # Get most active users
-    most_active_users = list(db.users.find(
-        {"last_login": {"$exists": True}},
-        {"email": 1, "last_login": 1, "_id": 1}
-    ).sort("last_login", -1).limit(10))
+    # Mock data for activity patterns (built once at import)
+    # In production, you would query actual upload/download logs
+    upload_patterns = _MOCK_UPLOAD_PATTERNS
+    download_patterns = _MOCK_DOWNLOAD_PATTERNS
+    
+    # Get most active users; the last_login index serves the sort, so only ten keys are walked
+    def most_active(hint=None):
+        # find() is lazy, so the hint is only rejected while the cursor is iterated
+        cursor = db.users.find(
+            {"last_login": {"$exists": True}},
+            {"email": 1, "last_login": 1},
+            hint=hint
+        ).sort("last_login", -1).limit(10)
+        # Convert ObjectId to string for serialization
+        return [{**user, "_id": str(user["_id"])} for user in cursor]
     
-    # Convert ObjectId to string for serialization
-    for user in most_active_users:
-        if "_id" in user and hasattr(user["_id"], "__str__"):
-            user["_id"] = str(user["_id"])
+    most_active_users = await asyncio.to_thread(run_hinted, most_active, hint=[("last_login", -1)])
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_activity_patterns",
         details=f"Viewed user activity patterns for {days} days",
@@ -1252,67 +1485,58 @@ async def get_user_retention_metrics(
 ):
     """Get user retention metrics"""
     
-    from datetime import timedelta
-    
-    now = datetime.utcnow()
-    
-    # Users registered 7 days ago
-    seven_days_ago = now - timedelta(days=7)
-    users_registered_7d_ago = db.users.count_documents({
-        "created_at": {
-            "$gte": seven_days_ago - timedelta(days=1),
-            "$lt": seven_days_ago + timedelta(days=1)
+    async def compute(now: datetime) -> dict:
+        seven_days_ago = now - timedelta(days=7)
+        thirty_days_ago = now - timedelta(days=30)
+        # Users registered around 7 / 30 days ago (a two-day window each)
+        cohort_7d = {"created_at": {"$gte": seven_days_ago - timedelta(days=1), "$lt": seven_days_ago + timedelta(days=1)}}
+        cohort_30d = {"created_at": {"$gte": thirty_days_ago - timedelta(days=1), "$lt": thirty_days_ago + timedelta(days=1)}}
+        
+        # The filtered counts in one round trip; each facet is a $match + $count over users
+        facets = {
+            "registered_7d": cohort_7d,
+            # Of those, how many are still active?
+            "retained_7d": {**cohort_7d, "last_login": {"$gte": seven_days_ago}},
+            "registered_30d": cohort_30d,
+            "retained_30d": {**cohort_30d, "last_login": {"$gte": thirty_days_ago}},
+            # Users who haven't logged in for 30+ days
+            "inactive": {"$or": [
+                {"last_login": {"$lt": thirty_days_ago}},
+                {"last_login": {"$exists": False}}
+            ]},
+            "new_30d": {"created_at": {"$gte": thirty_days_ago}},
         }
-    })
-    
-    # Of those, how many are still active?
-    retained_7d = db.users.count_documents({
-        "created_at": {
-            "$gte": seven_days_ago - timedelta(days=1),
-            "$lt": seven_days_ago + timedelta(days=1)
-        },
-        "last_login": {"$gte": seven_days_ago}
-    })
-    
-    # Users registered 30 days ago
-    thirty_days_ago = now - timedelta(days=30)
-    users_registered_30d_ago = db.users.count_documents({
-        "created_at": {
-            "$gte": thirty_days_ago - timedelta(days=1),
-            "$lt": thirty_days_ago + timedelta(days=1)
+        pipeline = [{"$facet": {
+            name: [{"$match": match}, {"$count": "n"}] for name, match in facets.items()
+        }}]
+        # The unfiltered total comes from collection metadata rather than a counted facet
+        result, total_users = await asyncio.gather(
+            asyncio.to_thread(lambda: next(db.users.aggregate(pipeline))),
+            asyncio.to_thread(db.users.estimated_document_count)
+        )
+        counts = {name: rows[0]["n"] if rows else 0 for name, rows in result.items()}
+        
+        # Calculate retention rates
+        retention_rate_7d = (counts["retained_7d"] / max(counts["registered_7d"], 1)) * 100
+        retention_rate_30d = (counts["retained_30d"] / max(counts["registered_30d"], 1)) * 100
+        
+        # Churn rate (users who haven't logged in for 30+ days)
+        churn_rate = (counts["inactive"] / max(total_users, 1)) * 100
+        
+        # New users in last 30 days
+        new_users_30d = counts["new_30d"]
+        
+        return {
+            "retention_rate_7d": round(retention_rate_7d, 2),
+            "retention_rate_30d": round(retention_rate_30d, 2),
+            "churn_rate": round(churn_rate, 2),
+            "new_users_last_30d": new_users_30d,
         }
-    })
-    
-    # Of those, how many are still active?
-    retained_30d = db.users.count_documents({
-        "created_at": {
-            "$gte": thirty_days_ago - timedelta(days=1),
-            "$lt": thirty_days_ago + timedelta(days=1)
-        },
-        "last_login": {"$gte": thirty_days_ago}
-    })
-    
-    # Calculate retention rates
-    retention_rate_7d = (retained_7d / max(users_registered_7d_ago, 1)) * 100
-    retention_rate_30d = (retained_30d / max(users_registered_30d_ago, 1)) * 100
-    
-    # Churn rate (users who haven't logged in for 30+ days)
-    total_users = db.users.count_documents({})
-    inactive_users = db.users.count_documents({
-        "$or": [
-            {"last_login": {"$lt": thirty_days_ago}},
-            {"last_login": {"$exists": False}}
-        ]
-    })
-    churn_rate = (inactive_users / max(total_users, 1)) * 100
     
-    # New users in last 30 days
-    new_users_30d = db.users.count_documents({
-        "created_at": {"$gte": thirty_days_ago}
-    })
+    payload = await _cached_analytics("user_retention", compute)
     
     # Log admin activity
-    await log_admin_activity(
+    queue_admin_activity(
         admin_email=current_admin.email,
         action="view_retention_metrics",
         details="Viewed user retention metrics",
@@ -1320,9 +1544,4 @@ async def get_user_retention_metrics(
         endpoint="/api/v1/admin/analytics/user-retention"
     )
     
-    return UserRetentionMetrics(
-        retention_rate_7d=round(retention_rate_7d, 2),
-        retention_rate_30d=round(retention_rate_30d, 2),
-        churn_rate=round(churn_rate, 2),
-        new_users_last_30d=new_users_30d
-    )
\ No newline at end of file
+    return UserRetentionMetrics(**payload)
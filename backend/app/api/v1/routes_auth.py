@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from app.services.auth_service import create_access_token, verify_password, get_password_hash, get_current_user
+from app.services.auth_service import create_access_token, verify_password, verify_and_update_password, get_password_hash, get_current_user, invalidate_cached_user
 from app.models.user import UserCreate, UserInDB, Token, UserProfileResponse, ForgotPasswordRequest, ResetPasswordRequest, PasswordResetResponse
 from app.models.google_oauth import GoogleAuthRequest, GoogleCallbackRequest, GoogleAuthResponse, GoogleCallbackResponse
 from app.services.storage_service import StorageService
@@ -8,14 +8,22 @@ from app.services.email_service import EmailService
 from app.services.password_reset_service import PasswordResetService
 from app.services.google_oauth_service import GoogleOAuthService
 from app.db.mongodb import db
+from pymongo.errors import DuplicateKeyError
+from collections import OrderedDict
 from datetime import timedelta, datetime
+import asyncio
 import time
 
 router = APIRouter()
 
 @router.post("/token", response_model=Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
-    user = db.users.find_one({"email": form_data.username})
+    # _id is the email, so this is a primary-key lookup fetching only what login needs
+    user = await asyncio.to_thread(
+        db.users.find_one,
+        {"_id": form_data.username},
+        {"hashed_password": 1, "is_google_user": 1}
+    )
     
     if not user:
         raise HTTPException(
@@ -33,28 +41,33 @@ async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(
         )
     
     # Verify password for non-Google users or Google users with passwords
-    if not verify_password(form_data.password, user["hashed_password"]):
+    # Hashing is CPU-bound; argon2/bcrypt release the GIL, so worker threads hash in parallel
+    password_ok, upgraded_hash = await asyncio.to_thread(
+        verify_and_update_password, form_data.password, user["hashed_password"]
+    )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if upgraded_hash:
+        # Legacy bcrypt hash: store the Argon2 rehash now that the plaintext is known
+        await asyncio.to_thread(
+            db.users.update_one,
+            {"_id": user["_id"], "hashed_password": user["hashed_password"]},
+            {"$set": {"hashed_password": upgraded_hash}}
+        )
     
     access_token_expires = timedelta(minutes=1440)
     access_token = create_access_token(
-        data={"sub": user["email"]}, expires_delta=access_token_expires
+        data={"sub": user["_id"]}, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=UserInDB)
 async def register_user(user: UserCreate):
-    db_user = db.users.find_one({"email": user.email})
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, user.password)
     user_dict = user.model_dump()
     user_dict.pop("password")
     user_dict["hashed_password"] = hashed_password
@@ -62,30 +75,43 @@ async def register_user(user: UserCreate):
     # In MongoDB, the primary key is _id. We'll use the email as the _id for simplicity.
     user_dict["_id"] = user.email 
     
-    db.users.insert_one(user_dict)
+    # The unique _id index rejects an existing email, so no lookup is needed first
+    try:
+        await asyncio.to_thread(db.users.insert_one, user_dict)
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
     
     return UserInDB(**user_dict)
 
 @router.get("/users/me", response_model=UserProfileResponse)
 async def read_users_me(current_user: UserInDB = Depends(get_current_user)):
-    # Get full user document from database
-    user_doc = db.users.find_one({"_id": current_user.id}, {"hashed_password": 0})
-    if not user_doc:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    
     # Calculate storage data
-    storage_data = StorageService.calculate_user_storage(current_user.id)
+    storage_data = await asyncio.to_thread(StorageService.get_cached_user_storage, current_user.id)
     
-    # Build enhanced profile response
+    # Build enhanced profile response from the user get_current_user already loaded
+    # (exclude_none keeps the document's defaults for fields the user never had)
+    user_doc = current_user.model_dump(by_alias=True, exclude_none=True)
     return StorageService.build_user_profile_response(user_doc, storage_data)
 
 # --- NEW: PASSWORD RESET ENDPOINTS ---
 
-# Simple rate limiting for forgot password
-FORGOT_PASSWORD_ATTEMPTS = {}
+# Simple rate limiting for forgot password: client IP -> (window_start, count).
+# Entries stay ordered by window start, so expired ones are pruned from the front, and the
+# map is capped so it cannot grow with every IP ever seen (the oldest window is evicted).
+FORGOT_PASSWORD_WINDOW_SECONDS = 3600  # 1 hour window
+FORGOT_PASSWORD_MAX_ATTEMPTS = 5  # Max 5 attempts per hour
+FORGOT_PASSWORD_MAX_TRACKED_IPS = 16000
+FORGOT_PASSWORD_ATTEMPTS: "OrderedDict[str, tuple]" = OrderedDict()
+
+def _prune_forgot_password_attempts(current_time: float) -> None:
+    while FORGOT_PASSWORD_ATTEMPTS:
+        oldest_ip, (window_start, _) = next(iter(FORGOT_PASSWORD_ATTEMPTS.items()))
+        if current_time - window_start < FORGOT_PASSWORD_WINDOW_SECONDS:
+            break
+        del FORGOT_PASSWORD_ATTEMPTS[oldest_ip]
 
 @router.post("/forgot-password", response_model=PasswordResetResponse)
 async def forgot_password(request: ForgotPasswordRequest, http_request: Request):
@@ -95,22 +121,24 @@ async def forgot_password(request: ForgotPasswordRequest, http_request: Request)
         client_ip = http_request.client.host
         current_time = time.time()
         
-        if client_ip in FORGOT_PASSWORD_ATTEMPTS:
-            last_attempt, count = FORGOT_PASSWORD_ATTEMPTS[client_ip]
-            if current_time - last_attempt < 3600:  # 1 hour window
-                if count >= 5:  # Max 5 attempts per hour
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Too many password reset attempts. Please try again later."
-                    )
-                FORGOT_PASSWORD_ATTEMPTS[client_ip] = (last_attempt, count + 1)
-            else:
-                FORGOT_PASSWORD_ATTEMPTS[client_ip] = (current_time, 1)
-        else:
+        # Whatever survives the prune is inside its window
+        _prune_forgot_password_attempts(current_time)
+        attempt = FORGOT_PASSWORD_ATTEMPTS.get(client_ip)
+        if attempt is None:
             FORGOT_PASSWORD_ATTEMPTS[client_ip] = (current_time, 1)
+            if len(FORGOT_PASSWORD_ATTEMPTS) > FORGOT_PASSWORD_MAX_TRACKED_IPS:
+                FORGOT_PASSWORD_ATTEMPTS.popitem(last=False)
+        else:
+            last_attempt, count = attempt
+            if count >= FORGOT_PASSWORD_MAX_ATTEMPTS:
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many password reset attempts. Please try again later."
+                )
+            FORGOT_PASSWORD_ATTEMPTS[client_ip] = (last_attempt, count + 1)
         
         # Check if user exists
-        user = db.users.find_one({"email": request.email})
+        user = await asyncio.to_thread(db.users.find_one, {"email": request.email}, {"_id": 1})
         if not user:
             # Don't reveal if email exists or not for security
             return PasswordResetResponse(
@@ -130,7 +158,7 @@ async def forgot_password(request: ForgotPasswordRequest, http_request: Request)
         email_sent = await EmailService.send_password_reset_email(
             email=request.email,
             reset_token=reset_token,
-            username=user.get("email", "").split("@")[0]
+            username=request.email.split("@", 1)[0]
         )
         
         if not email_sent:
@@ -164,7 +192,7 @@ async def reset_password(request: ResetPasswordRequest):
             )
         
         # Check if user still exists
-        user = db.users.find_one({"email": reset_data["email"]})
+        user = await asyncio.to_thread(db.users.find_one, {"email": reset_data["email"]})
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -172,16 +200,18 @@ async def reset_password(request: ResetPasswordRequest):
             )
         
         # Hash new password
-        hashed_password = get_password_hash(request.new_password)
+        hashed_password = await asyncio.to_thread(get_password_hash, request.new_password)
         
         # Update user password and reset Google OAuth flags
-        db.users.update_one(
+        await asyncio.to_thread(
+            db.users.update_one,
             {"email": reset_data["email"]},
             {"$set": {
                 "hashed_password": hashed_password,
                 "is_google_user": False  # Allow manual login after password reset
             }}
         )
+        invalidate_cached_user(reset_data["email"])
         
         # Mark token as used
         await PasswordResetService.mark_token_used(request.reset_token)
@@ -232,7 +262,7 @@ async def change_password(
                     detail="Current password is required"
                 )
                 
-            if not verify_password(password_data["current_password"], current_user.hashed_password):
+            if not await asyncio.to_thread(verify_password, password_data["current_password"], current_user.hashed_password):
                 print(f"Incorrect password provided for user: {current_user.email}")
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -255,14 +285,16 @@ async def change_password(
             )
         
         # Hash new password
-        hashed_password = get_password_hash(password_data["new_password"])
+        hashed_password = await asyncio.to_thread(get_password_hash, password_data["new_password"])
         
         # Update password and maintain Google OAuth flag
         # We don't change is_google_user flag as users can still use both methods
-        db.users.update_one(
+        await asyncio.to_thread(
+            db.users.update_one,
             {"email": current_user.email},
             {"$set": {"hashed_password": hashed_password}}
         )
+        invalidate_cached_user(current_user.email)
         
         print(f"Password successfully changed for user: {current_user.email}")
         return {"message": "Password changed successfully"}
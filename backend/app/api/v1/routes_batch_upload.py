@@ -1,5 +1,6 @@
 # File: Backend/app/api/v1/routes_batch_upload.py
 
+import asyncio
 import uuid
 import os
 import re
@@ -17,6 +18,7 @@ from app.services.auth_service import get_current_user_optional
 # --- MODIFIED: Import the pool manager and helper functions ---
 from app.services.google_drive_service import gdrive_pool_manager, create_resumable_upload_session
 from app.services import zipping_service
+from app.services.storage_service import StorageService
 # --- NEW: Import upload limits service and IP extraction ---
 from app.services.upload_limits_service import upload_limits_service
 from app.services.admin_auth_service import get_client_ip
@@ -42,6 +44,12 @@ BLOCKED_MIME_TYPES = {
     'application/x-sh'
 }
 
+# Batch metadata returns FileMetadataInDB, so only its fields are fetched (served by the batch_id index)
+BATCH_FILE_FIELDS = {field.alias or name: 1 for name, field in FileMetadataInDB.model_fields.items()}
+
+# Resumable upload sessions opened at once per batch (keeps a large batch inside Drive's request rate)
+RESUMABLE_SESSION_CONCURRENCY = 10
+
 # --- SECURITY: Filename sanitization functions ---
 def sanitize_filename(filename: str, max_length: int = 255) -> Tuple[str, bool]:
     """
@@ -263,23 +271,35 @@ async def initiate_batch_upload(
     batch_id = str(uuid.uuid4())
     file_upload_info_list = []
     file_ids_for_batch = []
+    file_docs = []
     total_batch_size = 0
 
-    for file_info in request.files:
-        file_id = str(uuid.uuid4())
-        total_batch_size += file_info.size
+    # Each resumable session is an independent HTTPS call to Drive, so they run concurrently
+    session_slots = asyncio.Semaphore(RESUMABLE_SESSION_CONCURRENCY)
 
-        try:
+    async def open_upload_session(file_info):
+        async with session_slots:
             # --- MODIFIED: Pass the same active account for every file in the batch ---
-            gdrive_upload_url = create_resumable_upload_session(
+            return await asyncio.to_thread(
+                create_resumable_upload_session,
                 filename=file_info.filename,
                 filesize=file_info.size,
                 account=active_account
             )
-        except Exception as e:
-            print(f"!!! FAILED to create Google Drive resumable session for {file_info.filename}: {e}")
+
+    upload_urls = await asyncio.gather(
+        *(open_upload_session(file_info) for file_info in request.files),
+        return_exceptions=True
+    )
+
+    for file_info, gdrive_upload_url in zip(request.files, upload_urls):
+        if isinstance(gdrive_upload_url, BaseException):
+            print(f"!!! FAILED to create Google Drive resumable session for {file_info.filename}: {gdrive_upload_url}")
             raise HTTPException(status_code=503, detail=f"Cloud storage service is currently unavailable for file: {file_info.filename}")
 
+        file_id = str(uuid.uuid4())
+        total_batch_size += file_info.size
+
         owner_id = user_id
         file_meta = FileMetadataCreate(
             _id=file_id,
@@ -297,7 +317,7 @@ async def initiate_batch_upload(
             is_anonymous=user_id is None,
             daily_quota_used=file_info.size
         )
-        db.files.insert_one(file_meta.model_dump(by_alias=True))
+        file_docs.append(file_meta.model_dump(by_alias=True))
 
         file_upload_info_list.append(
             InitiateBatchResponse.FileUploadInfo(
@@ -323,7 +343,12 @@ async def initiate_batch_upload(
         file_ids=file_ids_for_batch,
         owner_id=owner_id
     )
-    db.batches.insert_one(batch_meta.model_dump(by_alias=True))
+    # One round trip for all file records, alongside the batch record
+    inserts = [asyncio.to_thread(db.batches.insert_one, batch_meta.model_dump(by_alias=True))]
+    if file_docs:  # insert_many rejects an empty list
+        inserts.append(asyncio.to_thread(db.files.insert_many, file_docs, ordered=False))
+        inserts.append(asyncio.to_thread(StorageService.adjust_user_storage_counters, file_docs))
+    await asyncio.gather(*inserts)
 
     print(f"[BATCH_UPLOAD] Initiated batch {batch_id} on {active_account.id} with {len(file_ids_for_batch)} files.")
 
@@ -334,12 +359,11 @@ async def initiate_batch_upload(
 
 @router.get("/{batch_id}", response_model=List[FileMetadataInDB])
 async def get_batch_files_metadata(batch_id: str):
-    batch_doc = db.batches.find_one({"_id": batch_id})
+    batch_doc = await asyncio.to_thread(db.batches.find_one, {"_id": batch_id})
     if not batch_doc:
         raise HTTPException(status_code=404, detail="Batch not found")
     
-    file_docs_cursor = db.files.find({"batch_id": batch_id})
-    files_list = [file for file in file_docs_cursor]
+    files_list = await asyncio.to_thread(list, db.files.find({"batch_id": batch_id}, BATCH_FILE_FIELDS))
     
     if not files_list:
         raise HTTPException(status_code=404, detail="No files found for this batch")
@@ -363,12 +387,12 @@ async def cancel_batch_upload(batch_id: str):
     """Cancel an entire batch upload and all its files"""
     
     # 1. Find the batch
-    batch_doc = db.batches.find_one({"_id": batch_id})
+    batch_doc = await asyncio.to_thread(db.batches.find_one, {"_id": batch_id})
     if not batch_doc:
         raise HTTPException(status_code=404, detail="Batch not found")
     
     # 2. Get all files in the batch
-    file_docs = list(db.files.find({"batch_id": batch_id}))
+    file_docs = await asyncio.to_thread(list, db.files.find({"batch_id": batch_id}, {"status": 1}))
     if not file_docs:
         raise HTTPException(status_code=404, detail="No files found for this batch")
     
@@ -376,7 +400,8 @@ async def cancel_batch_upload(batch_id: str):
     cancelled_count = 0
     for file_doc in file_docs:
         if file_doc.get("status") in [UploadStatus.PENDING, UploadStatus.UPLOADING]:
-            update_result = db.files.update_one(
+            update_result = await asyncio.to_thread(
+                db.files.update_one,
                 {"_id": file_doc["_id"]}, 
                 {
                     "$set": {
@@ -390,7 +415,8 @@ async def cancel_batch_upload(batch_id: str):
                 cancelled_count += 1
     
     # 4. Update batch status
-    db.batches.update_one(
+    await asyncio.to_thread(
+        db.batches.update_one,
         {"_id": batch_id}, 
         {
             "$set": {
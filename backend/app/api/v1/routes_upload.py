@@ -16,6 +16,7 @@ from app.services.auth_service import get_current_user_optional, get_current_use
 from app.services.google_drive_service import gdrive_pool_manager, create_resumable_upload_session
 # --- NEW: Import upload limits service and IP extraction ---
 from app.services.upload_limits_service import upload_limits_service
+from app.services.storage_service import StorageService
 from app.services.admin_auth_service import get_client_ip
 from app.core.config import settings
 # from app.ws_manager import manager # Assuming you have a WebSocket manager for admin logs
@@ -317,7 +318,9 @@ async def initiate_upload(
         is_anonymous=user_id is None,
         daily_quota_used=request.size
     )
-    db.files.insert_one(file_meta.model_dump(by_alias=True))
+    file_doc = file_meta.model_dump(by_alias=True)
+    db.files.insert_one(file_doc)
+    StorageService.adjust_user_storage_counters([file_doc])
     
     # Background refresh of the target account's quota and stats so Admin UI updates quickly
     try:
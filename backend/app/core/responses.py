@@ -0,0 +1,20 @@
+from typing import Any
+from bson import ObjectId
+from fastapi.responses import ORJSONResponse
+import orjson
+
+def _orjson_default(obj: Any) -> Any:
+    """Encode types orjson does not handle natively"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+class MongoORJSONResponse(ORJSONResponse):
+    """ORJSONResponse that also encodes raw Mongo documents (ObjectId values as strings)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        )
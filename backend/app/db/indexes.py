@@ -0,0 +1,76 @@
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from app.db.mongodb import db
+import logging
+from typing import Callable, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Indexes backing the admin query paths. The report routes pass some of these key
+# patterns as aggregation/find hints, so they must exist before those routes run.
+QUERY_INDEXES: Dict[str, List[List[Tuple[str, int]]]] = {
+    "files": [
+        [("created_at", DESCENDING)],
+        # Covering indexes: the user-activity lookup and the file-type breakdown
+        # read only these fields, so they are served without fetching documents
+        [("uploaded_by", ASCENDING), ("created_at", DESCENDING), ("file_size", ASCENDING)],
+        [("file_type", ASCENDING), ("file_size", ASCENDING)],
+        # Per-account soft-delete in the storage admin routes
+        [("gdrive_account_id", ASCENDING), ("deleted_at", ASCENDING)],
+        # Per-user file listing (sorted by upload_date) and the per-user storage totals
+        [("owner_id", ASCENDING), ("upload_date", DESCENDING)],
+        [("owner_id", ASCENDING), ("size_bytes", ASCENDING)],
+        # Batch upload metadata and cancel look files up by batch
+        [("batch_id", ASCENDING)],
+    ],
+    "users": [
+        [("created_at", DESCENDING)],
+        # Prefix search on email in the admin user list
+        [("email", ASCENDING)],
+        # Status filter + created_at sort in the admin user list
+        [("is_banned", ASCENDING), ("is_suspended", ASCENDING), ("created_at", DESCENDING)],
+        # User analytics: last_login windows, alone and scoped to non-suspended/non-banned users
+        [("last_login", DESCENDING)],
+        [("is_suspended", ASCENDING), ("is_banned", ASCENDING), ("last_login", DESCENDING)],
+        # Top users by the denormalised storage counter
+        [("storage_used", DESCENDING)],
+    ],
+    "admin_activity_logs": [
+        [("timestamp", DESCENDING)],
+        [("timestamp", DESCENDING), ("action", ASCENDING)],
+    ],
+    "notifications": [
+        [("created_at", DESCENDING)],
+    ],
+    "notification_deliveries": [
+        [("created_at", DESCENDING)],
+    ],
+    "backup_logs": [
+        [("created_at", DESCENDING)],
+    ],
+}
+
+def ensure_indexes() -> None:
+    """Create the query indexes if missing (create_index is a no-op when they already exist)"""
+    for collection_name, index_specs in QUERY_INDEXES.items():
+        for keys in index_specs:
+            try:
+                db[collection_name].create_index(keys, background=True)
+            except Exception as e:
+                logger.error(f"Failed to create index {keys} on {collection_name}: {e}")
+
+# MongoDB error code (BadValue) returned when a hinted index does not exist
+BAD_HINT_ERROR_CODE = 2
+
+def run_hinted(operation: Callable, *args, hint=None, **kwargs):
+    """Call a PyMongo operation with an index hint, retrying without it if the index is missing"""
+    if hint is None:
+        return operation(*args, **kwargs)
+    try:
+        return operation(*args, hint=hint, **kwargs)
+    except OperationFailure as e:
+        if e.code != BAD_HINT_ERROR_CODE:
+            raise
+        # ensure_indexes() only logs index build failures, so a missing index must not fail the query
+        logger.warning("Index hint %s rejected, retrying without hint: %s", hint, e)
+        return operation(*args, **kwargs)
@@ -3,6 +3,7 @@
 import httpx
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from typing import List
 import asyncio
 import psutil
@@ -10,6 +11,7 @@ import psutil
 from app.api.v1.routes_upload import router as http_upload_router
 from app.api.v1 import routes_auth, routes_download, routes_batch_upload
 from app.db.mongodb import db
+from app.db.indexes import ensure_indexes
 from app.models.file import UploadStatus, StorageLocation
 from app.core.config import settings
 # Use the new, stable backup service
@@ -113,7 +115,7 @@ class ConnectionManager:
                 await asyncio.sleep(60)  # Wait longer on error
 
 manager = ConnectionManager()
-app = FastAPI(title="File Transfer Service")
+app = FastAPI(title="File Transfer Service", default_response_class=ORJSONResponse)
 
 def configure_cors(app):
     """
@@ -272,6 +274,13 @@ async def startup_storage_management():
         else:
             print("WARNING: CORS security issues detected in development mode")
     
+    try:
+        # Indexes used as query hints by the admin report routes
+        ensure_indexes()
+        print("[MAIN] Database query indexes ensured")
+    except Exception as e:
+        print(f"[MAIN] Index creation failed: {e}")
+
     try:
         # Ensure accounts collection exists, migrate from env on first run, and sync
         await GoogleDriveAccountService.initialize_service()
@@ -291,12 +300,28 @@ async def startup_storage_management():
             # Refresh every 15 minutes
             await asyncio.sleep(900)
 
+    # Background writer for queued admin activity log entries
+    from app.services.admin_auth_service import run_admin_activity_writer
+    asyncio.create_task(run_admin_activity_writer())
+
     try:
         asyncio.create_task(periodic_account_health_refresh())
         print("[MAIN] Scheduled periodic account health refresh task")
     except Exception as e:
         print(f"[MAIN] Failed to schedule periodic account health refresh: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_http_clients():
+    from app.api.v1.routes_admin_users import close_hetzner_client
+    from app.services.google_oauth_service import close_google_client
+    await close_hetzner_client()
+    await close_google_client()
+
+@app.on_event("shutdown")
+async def shutdown_flush_admin_activity():
+    from app.services.admin_auth_service import flush_admin_activity
+    await flush_admin_activity()
+
 @app.websocket("/ws_admin")
 async def websocket_admin_endpoint(websocket: WebSocket, token: str = ""):
     """Admin WebSocket endpoint with real-time database role verification"""
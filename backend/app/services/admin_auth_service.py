@@ -7,9 +7,13 @@ from app.core.config import settings
 from app.db.mongodb import db
 from app.models.admin import AdminUserInDB, AdminActivityLog, AdminToken, AdminUserCreate
 from app.models.user import UserRole
-from app.services.auth_service import verify_password, get_password_hash
+from app.services.auth_service import verify_and_update_password, get_password_hash, invalidate_cached_user
+import asyncio
+import logging
 import uuid
 
+logger = logging.getLogger(__name__)
+
 # Admin-specific OAuth2 scheme
 admin_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/admin/auth/token")
 
@@ -35,9 +39,19 @@ async def authenticate_admin(email: str, password: str) -> Optional[AdminUserInD
     if not user:
         return None
     
-    # Verify password
-    if not verify_password(password, user["hashed_password"]):
+    # Verify password (CPU-bound, so on a worker thread rather than the event loop)
+    password_ok, upgraded_hash = await asyncio.to_thread(
+        verify_and_update_password, password, user["hashed_password"]
+    )
+    if not password_ok:
         return None
+    if upgraded_hash:
+        # Legacy bcrypt hash: store the Argon2 rehash now that the plaintext is known
+        await asyncio.to_thread(
+            db.users.update_one,
+            {"_id": user["_id"], "hashed_password": user["hashed_password"]},
+            {"$set": {"hashed_password": upgraded_hash}}
+        )
     
     # Verify admin role
     user_role = user.get("role", "regular")
@@ -67,6 +81,7 @@ async def authenticate_admin(email: str, password: str) -> Optional[AdminUserInD
         {"email": email},
         {"$set": update_fields}
     )
+    invalidate_cached_user(email)
     
     return AdminUserInDB(**user)
 
@@ -89,7 +104,8 @@ async def get_current_admin(token: str = Depends(admin_oauth2_scheme)) -> AdminU
     except JWTError:
         raise credentials_exception
     
-    user = db.users.find_one({"email": email})
+    # Runs on every admin request; keep the lookup off the event loop
+    user = await asyncio.to_thread(db.users.find_one, {"email": email})
     if user is None:
         raise credentials_exception
     
@@ -127,7 +143,7 @@ async def create_admin_user(admin_data: AdminUserCreate, created_by: str) -> Adm
         )
     
     # Hash password
-    hashed_password = get_password_hash(admin_data.password)
+    hashed_password = await asyncio.to_thread(get_password_hash, admin_data.password)
     
     # Create admin user document
     admin_dict = {
@@ -153,15 +169,14 @@ async def create_admin_user(admin_data: AdminUserCreate, created_by: str) -> Adm
     
     return AdminUserInDB(**admin_dict)
 
-async def log_admin_activity(
-    admin_email: str, 
-    action: str, 
-    details: Optional[str] = None,
-    ip_address: Optional[str] = None,
-    endpoint: Optional[str] = None
-):
-    """Log admin activity to database"""
-    log_entry = {
+def _activity_log_entry(
+    admin_email: str,
+    action: str,
+    details: Optional[str],
+    ip_address: Optional[str],
+    endpoint: Optional[str]
+) -> dict:
+    return {
         "_id": str(uuid.uuid4()),
         "admin_email": admin_email,
         "action": action,
@@ -170,9 +185,64 @@ async def log_admin_activity(
         "endpoint": endpoint,
         "details": details
     }
+
+async def log_admin_activity(
+    admin_email: str, 
+    action: str, 
+    details: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    endpoint: Optional[str] = None
+):
+    """Log admin activity to database"""
+    log_entry = _activity_log_entry(admin_email, action, details, ip_address, endpoint)
     
     db.admin_activity_logs.insert_one(log_entry)
 
+# Queued activity logging: handlers enqueue entries and return immediately, and a
+# background writer drains the queue with batched insert_many calls
+ADMIN_ACTIVITY_QUEUE_SIZE = 10000
+ADMIN_ACTIVITY_BATCH_SIZE = 500
+_admin_activity_queue: asyncio.Queue = asyncio.Queue(maxsize=ADMIN_ACTIVITY_QUEUE_SIZE)
+
+def queue_admin_activity(
+    admin_email: str,
+    action: str,
+    details: Optional[str] = None,
+    ip_address: Optional[str] = None,
+    endpoint: Optional[str] = None
+) -> None:
+    """Queue an admin activity log entry for the background writer"""
+    log_entry = _activity_log_entry(admin_email, action, details, ip_address, endpoint)
+    try:
+        _admin_activity_queue.put_nowait(log_entry)
+    except asyncio.QueueFull:
+        # Writer is falling behind; write inline rather than lose audit entries
+        db.admin_activity_logs.insert_one(log_entry)
+
+def _next_activity_batch() -> list:
+    batch = []
+    while len(batch) < ADMIN_ACTIVITY_BATCH_SIZE and not _admin_activity_queue.empty():
+        batch.append(_admin_activity_queue.get_nowait())
+    return batch
+
+async def _write_activity_batch(batch: list) -> None:
+    try:
+        await asyncio.to_thread(db.admin_activity_logs.insert_many, batch, ordered=False)
+    except Exception as e:
+        logger.error("Failed to write %d admin activity log entries: %s", len(batch), e)
+
+async def run_admin_activity_writer() -> None:
+    """Drain queued activity log entries in batches (started as a startup task)"""
+    while True:
+        batch = [await _admin_activity_queue.get()]
+        batch.extend(_next_activity_batch())
+        await _write_activity_batch(batch)
+
+async def flush_admin_activity() -> None:
+    """Write any queued activity log entries (shutdown hook)"""
+    while batch := _next_activity_batch():
+        await _write_activity_batch(batch)
+
 async def get_admin_activity_logs(limit: int = 50, skip: int = 0) -> dict:
     """Get paginated admin activity logs"""
     # Get total count
@@ -194,4 +264,8 @@ def get_client_ip(request: Request) -> str:
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
         return forwarded.split(",")[0].strip()
-    return request.client.host if request.client else "unknown"
\ No newline at end of file
+    return request.client.host if request.client else "unknown"
+
+async def client_ip(request: Request) -> str:
+    """Dependency form of get_client_ip; FastAPI resolves it once per request"""
+    return get_client_ip(request)
\ No newline at end of file
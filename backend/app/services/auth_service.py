@@ -1,7 +1,8 @@
 # server/backend/app/services/auth_service.py (Updated)
 
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -9,8 +10,20 @@ from fastapi.security import OAuth2PasswordBearer
 from app.core.config import settings
 from app.db.mongodb import db
 from app.models.user import TokenData, UserInDB
+import asyncio
+import calendar
+import hashlib
+import time
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# New hashes use Argon2id (OWASP parameters: 46 MiB, t=2, p=1); bcrypt stays listed so
+# existing hashes still verify and are flagged for rehashing (see verify_and_update_password)
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__memory_cost=46 * 1024,
+    argon2__time_cost=2,
+    argon2__parallelism=1,
+)
 
 # This one requires a token and raises an error if it's missing
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
@@ -21,17 +34,36 @@ oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token", aut
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update_password(plain_password, hashed_password) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also returns a replacement hash when the stored one is a legacy scheme"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# Signed tokens per (claims, exp). exp is rounded down to whole minutes, so repeat logins for
+# the same user within a minute reuse one signed token instead of signing again
+ACCESS_TOKEN_EXP_BUCKET_SECONDS = 60
+ACCESS_TOKEN_CACHE_MAX_ENTRIES = 10000
+_access_token_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
-    to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+    exp = calendar.timegm(expire.utctimetuple())
+    exp -= exp % ACCESS_TOKEN_EXP_BUCKET_SECONDS
+    
+    key = (tuple(sorted(data.items())), exp)
+    encoded_jwt = _access_token_cache.get(key)
+    if encoded_jwt is None:
+        to_encode = data.copy()
+        to_encode.update({"exp": exp})
+        encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
+        _access_token_cache[key] = encoded_jwt
+        if len(_access_token_cache) > ACCESS_TOKEN_CACHE_MAX_ENTRIES:
+            _access_token_cache.popitem(last=False)
     return encoded_jwt
 
 def _convert_datetime_fields(user_data: dict) -> dict:
@@ -46,6 +78,71 @@ def _convert_datetime_fields(user_data: dict) -> dict:
     
     return converted_data
 
+# Users resolved per bearer token, so repeat requests within the TTL skip the JWT decode and
+# the user lookup. Keyed by a token digest, LRU-bounded, and never kept past the token's exp.
+CURRENT_USER_CACHE_TTL_SECONDS = 30
+CURRENT_USER_CACHE_MAX_ENTRIES = 10000
+_current_user_cache: "OrderedDict[bytes, Tuple[float, UserInDB]]" = OrderedDict()
+# email -> cache keys of that user's tokens, so invalidation does not scan the cache
+_cached_keys_by_email: Dict[str, Set[bytes]] = {}
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()[:16]
+
+def _drop_cached_key(key: bytes) -> None:
+    """Remove one cache entry and its email index reference"""
+    entry = _current_user_cache.pop(key, None)
+    if entry is None:
+        return
+    email = entry[1].email
+    keys = _cached_keys_by_email.get(email)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del _cached_keys_by_email[email]
+
+def invalidate_cached_user(email: str) -> None:
+    """Drop cached users for email after any write to their record (password, role, ban/suspend, delete)"""
+    for key in _cached_keys_by_email.pop(email, ()):
+        _current_user_cache.pop(key, None)
+
+async def _user_for_token(token: str) -> Optional[UserInDB]:
+    """Resolve the user for a bearer token, or None if the token or user is invalid"""
+    key = _token_cache_key(token)
+    cached = _current_user_cache.get(key)
+    if cached is not None:
+        expires_at, user = cached
+        if time.monotonic() < expires_at:
+            _current_user_cache.move_to_end(key)
+            return user
+        _drop_cached_key(key)
+    
+    try:
+        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    token_data = TokenData(email=email)
+    
+    user = await asyncio.to_thread(db.users.find_one, {"email": token_data.email})
+    if user is None:
+        return None
+    
+    # Convert datetime fields to strings before creating UserInDB
+    user = UserInDB(**_convert_datetime_fields(user))
+    
+    ttl = CURRENT_USER_CACHE_TTL_SECONDS
+    if payload.get("exp") is not None:
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        _current_user_cache[key] = (time.monotonic() + ttl, user)
+        _cached_keys_by_email.setdefault(user.email, set()).add(key)
+        if len(_current_user_cache) > CURRENT_USER_CACHE_MAX_ENTRIES:
+            _drop_cached_key(next(iter(_current_user_cache)))
+    return user
+
 # This function remains for protected routes like /users/me
 async def get_current_user(token: str = Depends(oauth2_scheme)):
     credentials_exception = HTTPException(
@@ -53,22 +150,10 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.users.find_one({"email": token_data.email})
+    user = await _user_for_token(token)
     if user is None:
         raise credentials_exception
-    
-    # Convert datetime fields to strings before creating UserInDB
-    user = _convert_datetime_fields(user)
-    return UserInDB(**user)
+    return user
 
 # --- NEW: Function for optional authentication ---
 # async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme_optional)) -> Optional[UserInDB]:
@@ -97,32 +182,9 @@ async def get_current_user_optional(token: Optional[str] = Depends(oauth2_scheme
     if token is None:
         # This is the case for a completely anonymous user (no Authorization header)
         return None
-        
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     
-    try:
-        payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            # Token is valid but doesn't contain the user identifier
-            return None
-        
-        user = db.users.find_one({"email": email})
-        if user is None:
-            # Token is for a user that no longer exists
-            return None
-        
-        # Convert datetime fields to strings before creating UserInDB
-        user = _convert_datetime_fields(user)
-        return UserInDB(**user)
-    except JWTError:
-        # Token is malformed, expired, or has an invalid signature.
-        # For an optional endpoint, we treat this as an anonymous user.
-        return None
+    # A malformed, expired or orphaned token is treated as an anonymous user
+    return await _user_for_token(token)
 
 # Add this function to the end of auth_service.py
 
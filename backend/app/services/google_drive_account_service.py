@@ -2,7 +2,7 @@ import asyncio
 import json
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from google.auth.transport.requests import AuthorizedSession
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
@@ -19,6 +19,48 @@ from app.core.config import settings
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# (divisor, suffix) per 1024x unit step, indexed by format_storage_size
+_SIZE_UNITS = [(1, "B"), (1 << 10, "KB"), (1 << 20, "MB"), (1 << 30, "GB"), (1 << 40, "TB"), (1 << 50, "PB")]
+
+# Server-side account statistics; average_performance only counts scored accounts
+# ($avg skips the nulls produced for unscored ones)
+_ACCOUNT_STATS_GROUP = {"$group": {
+    "_id": None,
+    "total_accounts": {"$sum": 1},
+    "active_accounts": {"$sum": {"$cond": ["$is_active", 1, 0]}},
+    "total_storage_used": {"$sum": "$storage_used"},
+    "total_storage_quota": {"$sum": "$storage_quota"},
+    "average_performance": {"$avg": {"$cond": [{"$gt": ["$performance_score", 0]}, "$performance_score", None]}},
+}}
+
+def _account_statistics(stats: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Shape the output of _ACCOUNT_STATS_GROUP into the statistics dict"""
+    row = stats[0] if stats else {}
+    return {
+        "total_accounts": row.get("total_accounts", 0),
+        "active_accounts": row.get("active_accounts", 0),
+        "total_storage_used": row.get("total_storage_used", 0),
+        "total_storage_quota": row.get("total_storage_quota", 0),
+        "average_performance": row.get("average_performance") or 0
+    }
+
+def _data_freshness_stage(stale_after_seconds: int) -> Dict[str, Any]:
+    """$addFields stage marking accounts whose last quota check is older than
+    stale_after_seconds (or missing) as "stale", otherwise "fresh"
+    """
+    return {"$addFields": {"data_freshness": {"$cond": [
+        {"$and": [
+            "$last_quota_check",
+            {"$lt": [{"$subtract": ["$$NOW", "$last_quota_check"]}, stale_after_seconds * 1000]},
+        ]},
+        "fresh",
+        "stale",
+    ]}}}
+
+# Upper bound on concurrent Drive quota refreshes, to stay under the Drive API rate limits
+QUOTA_REFRESH_CONCURRENCY = 8
+_quota_refresh_semaphore = asyncio.Semaphore(QUOTA_REFRESH_CONCURRENCY)
+
 class GoogleDriveAccountService:
     """Service for managing Google Drive accounts"""
     
@@ -214,21 +256,32 @@ class GoogleDriveAccountService:
             print(f"Error updating account stats for {account_id}: {e}")
     
     @staticmethod
-    async def create_account(account_data: GoogleDriveAccountCreate) -> GoogleDriveAccountDB:
-        """Create a new Google Drive account"""
+    async def create_account(
+        account_data: GoogleDriveAccountCreate,
+        service_account_info: Optional[Dict[str, Any]] = None,
+    ) -> GoogleDriveAccountDB:
+        """Create a new Google Drive account.
+
+        service_account_info is the already-parsed service_account_key, when the
+        caller has parsed it; otherwise the key is parsed here, once.
+        """
         await GoogleDriveAccountService._ensure_collection_exists()
         
+        if account_data.service_account_key and service_account_info is None:
+            try:
+                service_account_info = json.loads(account_data.service_account_key)
+            except json.JSONDecodeError:
+                raise ValueError("Credential validation failed: Invalid service account JSON format")
+        
         # Validate credentials with Google Drive API
-        await GoogleDriveAccountService._validate_credentials(account_data)
+        await GoogleDriveAccountService._validate_credentials(account_data, service_account_info)
         
         # Generate unique account ID
         account_id = f"account_{uuid.uuid4().hex[:8]}"
         
         # Parse service account data if provided
         service_account_data = {}
-        if account_data.service_account_key:
-            import json
-            service_account_info = json.loads(account_data.service_account_key)
+        if service_account_info is not None:
             service_account_data = {
                 "private_key": service_account_info.get("private_key"),
                 "private_key_id": service_account_info.get("private_key_id"),
@@ -292,6 +345,18 @@ class GoogleDriveAccountService:
         
         return accounts
     
+    @staticmethod
+    def iter_accounts(stale_after_seconds: int) -> Iterator[Tuple[GoogleDriveAccountDB, str]]:
+        """Yield (account, data_freshness) pairs one at a time from a cursor, sorted by account_id"""
+        cursor = db.google_drive_accounts.aggregate([
+            {"$sort": {"account_id": 1}},
+            {"$project": {"_id": 0}},
+            _data_freshness_stage(stale_after_seconds),
+        ])
+        for doc in cursor:
+            data_freshness = doc.pop("data_freshness")
+            yield GoogleDriveAccountDB(**doc), data_freshness
+    
     @staticmethod
     async def get_account_by_id(account_id: str) -> Optional[GoogleDriveAccountDB]:
         """Get account by ID"""
@@ -356,51 +421,82 @@ class GoogleDriveAccountService:
         await GoogleDriveAccountService._update_account_quota(account)
         return account
     
+    @staticmethod
+    async def refresh_accounts_quota(accounts: List[GoogleDriveAccountDB]) -> List[Any]:
+        """Refresh quota for several accounts concurrently.
+
+        _update_account_quota runs its blocking googleapiclient calls on a worker
+        thread, so the refreshes overlap. Returns one result per account, in order, with
+        exceptions returned instead of raised.
+        """
+        async def _refresh(account: GoogleDriveAccountDB) -> None:
+            async with _quota_refresh_semaphore:
+                await GoogleDriveAccountService._update_account_quota(account)
+
+        return await asyncio.gather(*(_refresh(account) for account in accounts), return_exceptions=True)
+    
     @staticmethod
     async def update_all_accounts_quota() -> List[GoogleDriveAccountDB]:
         """Update quota for all accounts"""
         accounts = await GoogleDriveAccountService.get_all_accounts()
         updated_accounts = []
         
-        for account in accounts:
-            try:
-                await GoogleDriveAccountService._update_account_quota(account)
+        results = await GoogleDriveAccountService.refresh_accounts_quota(accounts)
+        for account, result in zip(accounts, results):
+            if isinstance(result, Exception):
+                print(f"Error updating quota for account {account.account_id}: {result}")
+            else:
                 updated_accounts.append(account)
-            except Exception as e:
-                print(f"Error updating quota for account {account.account_id}: {e}")
         
         return updated_accounts
     
     @staticmethod
     async def get_account_statistics() -> Dict[str, Any]:
         """Get aggregated statistics for all accounts"""
-        accounts = await GoogleDriveAccountService.get_all_accounts()
-        
-        total_accounts = len(accounts)
-        active_accounts = len([acc for acc in accounts if acc.is_active])
-        total_storage_used = sum(acc.storage_used for acc in accounts)
-        total_storage_quota = sum(acc.storage_quota for acc in accounts)
+        stats = list(db.google_drive_accounts.aggregate([_ACCOUNT_STATS_GROUP]))
+        return _account_statistics(stats)
+    
+    @staticmethod
+    async def get_accounts_with_stats(
+        stale_after_seconds: int,
+    ) -> Tuple[List[GoogleDriveAccountDB], Dict[str, Any], Dict[str, str]]:
+        """Get all accounts and their aggregated statistics in one round-trip.
+
+        Also returns each account's data_freshness ("fresh"/"stale", computed by
+        Mongo against stale_after_seconds), keyed by account_id.
+        """
+        pipeline = [{"$facet": {
+            "accounts": [
+                {"$sort": {"account_id": 1}},
+                {"$project": {"_id": 0}},
+                _data_freshness_stage(stale_after_seconds),
+            ],
+            "stats": [_ACCOUNT_STATS_GROUP],
+        }}]
+        result = next(db.google_drive_accounts.aggregate(pipeline), {})
         
-        # Calculate average performance
-        performance_scores = [acc.performance_score for acc in accounts if acc.performance_score > 0]
-        average_performance = sum(performance_scores) / len(performance_scores) if performance_scores else 0
+        if not result.get("accounts"):
+            # Empty collection: get_all_accounts migrates the env-configured accounts.
+            # Migrated accounts have never had a quota check, so they are all stale.
+            accounts = await GoogleDriveAccountService.get_all_accounts()
+            freshness = {account.account_id: "stale" for account in accounts}
+            return accounts, await GoogleDriveAccountService.get_account_statistics(), freshness
         
-        return {
-            "total_accounts": total_accounts,
-            "active_accounts": active_accounts,
-            "total_storage_used": total_storage_used,
-            "total_storage_quota": total_storage_quota,
-            "average_performance": average_performance
-        }
+        freshness = {doc["account_id"]: doc.pop("data_freshness") for doc in result["accounts"]}
+        accounts = [GoogleDriveAccountDB(**doc) for doc in result["accounts"]]
+        return accounts, _account_statistics(result.get("stats", [])), freshness
     
     @staticmethod
-    async def _validate_credentials(account_data: GoogleDriveAccountCreate) -> None:
+    async def _validate_credentials(
+        account_data: GoogleDriveAccountCreate,
+        service_account_info: Optional[Dict[str, Any]] = None,
+    ) -> None:
         """Validate Google Drive credentials by making a test API call"""
         try:
             # Determine if this is a service account or OAuth 2.0
             if account_data.service_account_key:
                 # Service account validation
-                await GoogleDriveAccountService._validate_service_account(account_data)
+                await GoogleDriveAccountService._validate_service_account(account_data, service_account_info)
             elif account_data.client_id and account_data.client_secret and account_data.refresh_token:
                 # OAuth 2.0 validation
                 await GoogleDriveAccountService._validate_oauth_credentials(account_data)
@@ -411,14 +507,18 @@ class GoogleDriveAccountService:
             raise ValueError(f"Credential validation failed: {str(e)}")
     
     @staticmethod
-    async def _validate_service_account(account_data: GoogleDriveAccountCreate) -> None:
+    async def _validate_service_account(
+        account_data: GoogleDriveAccountCreate,
+        service_account_info: Optional[Dict[str, Any]] = None,
+    ) -> None:
         """Validate service account credentials"""
         try:
             import json
             from google.oauth2 import service_account
             
-            # Parse service account JSON
-            service_account_info = json.loads(account_data.service_account_key)
+            # Parse service account JSON unless the caller already did
+            if service_account_info is None:
+                service_account_info = json.loads(account_data.service_account_key)
             
             # Create service account credentials
             creds = service_account.Credentials.from_service_account_info(
@@ -475,7 +575,7 @@ class GoogleDriveAccountService:
             raise ValueError(f"OAuth validation failed: {str(e)}")
     
     @staticmethod
-    async def _get_folder_path(service, folder_id: str) -> str:
+    def _get_folder_path(service, folder_id: str) -> str:
         """Get the full path of a Google Drive folder"""
         try:
             path_parts = []
@@ -499,6 +599,15 @@ class GoogleDriveAccountService:
     @staticmethod
     async def _update_account_quota(account: GoogleDriveAccountDB) -> None:
         """Update account storage quota and usage from Google Drive API"""
+        await asyncio.to_thread(GoogleDriveAccountService._update_account_quota_sync, account)
+    
+    @staticmethod
+    def _update_account_quota_sync(account: GoogleDriveAccountDB) -> bool:
+        """Blocking body of _update_account_quota; run it on a worker thread.
+
+        Returns True when the quota was refreshed, False when the probe failed
+        and the account was marked with health_status "error".
+        """
         try:
             # Create credentials based on account type
             if account.private_key:
@@ -553,7 +662,7 @@ class GoogleDriveAccountService:
                     folder_name = folder_info.get('name')
                     
                     # Build folder path
-                    folder_path = await GoogleDriveAccountService._get_folder_path(service, account.folder_id)
+                    folder_path = GoogleDriveAccountService._get_folder_path(service, account.folder_id)
                 except Exception as e:
                     print(f"Error fetching folder info for account {account.account_id}: {e}")
             
@@ -718,6 +827,7 @@ class GoogleDriveAccountService:
             account.folder_path = folder_path
             account.last_quota_check = datetime.utcnow()
             account.updated_at = datetime.utcnow()
+            return True
             
         except Exception as e:
             print(f"Error updating quota for account {account.account_id}: {e}")
@@ -730,12 +840,18 @@ class GoogleDriveAccountService:
                     "updated_at": datetime.utcnow()
                 }}
             )
+            return False
 
     @staticmethod
     async def delete_all_files_in_account_folder(account: GoogleDriveAccountDB) -> Dict[str, Any]:
         """Delete all files under the configured folder_id for a given account.
         Returns counts of deleted files and errors.
         """
+        return await asyncio.to_thread(GoogleDriveAccountService.delete_all_files_in_account_folder_sync, account)
+
+    @staticmethod
+    def delete_all_files_in_account_folder_sync(account: GoogleDriveAccountDB) -> Dict[str, Any]:
+        """Blocking body of delete_all_files_in_account_folder; run it on a worker thread"""
         if not account.folder_id:
             return {"deleted": 0, "errors": 0, "message": "No folder_id configured; skipped"}
         try:
@@ -804,7 +920,7 @@ class GoogleDriveAccountService:
                 }}
             )
             try:
-                await GoogleDriveAccountService._update_account_quota(account)
+                GoogleDriveAccountService._update_account_quota_sync(account)
             except Exception as qe:
                 print(f"[GDRIVE_RESET] Quota refresh failed for {account.account_id}: {qe}")
             return {"deleted": deleted, "errors": errors}
@@ -816,11 +932,16 @@ class GoogleDriveAccountService:
     async def delete_all_files_all_accounts() -> Dict[str, Any]:
         """Delete all files under configured folders for all accounts in DB."""
         accounts = await GoogleDriveAccountService.get_all_accounts()
+        return await asyncio.to_thread(GoogleDriveAccountService.delete_all_files_all_accounts_sync, accounts)
+
+    @staticmethod
+    def delete_all_files_all_accounts_sync(accounts: List[GoogleDriveAccountDB]) -> Dict[str, Any]:
+        """Blocking body of delete_all_files_all_accounts for the given accounts"""
         total_deleted = 0
         total_errors = 0
         results = {}
         for acc in accounts:
-            res = await GoogleDriveAccountService.delete_all_files_in_account_folder(acc)
+            res = GoogleDriveAccountService.delete_all_files_in_account_folder_sync(acc)
             results[acc.account_id] = res
             total_deleted += res.get("deleted", 0)
             total_errors += res.get("errors", 0)
@@ -829,16 +950,12 @@ class GoogleDriveAccountService:
     @staticmethod
     def format_storage_size(bytes_size: int) -> str:
         """Format storage size in human-readable format"""
-        if bytes_size == 0:
-            return "0 B"
-        
-        size_names = ["B", "KB", "MB", "GB", "TB", "PB"]
-        i = 0
-        while bytes_size >= 1024 and i < len(size_names) - 1:
-            bytes_size /= 1024.0
-            i += 1
-        
-        return f"{bytes_size:.1f} {size_names[i]}"
+        # Each unit step is 10 bits, so the unit index comes straight from bit_length()
+        idx = min((max(int(bytes_size), 1).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        if idx == 0:
+            return f"{bytes_size} B"
+        divisor, suffix = _SIZE_UNITS[idx]
+        return f"{bytes_size / divisor:.1f} {suffix}"
     
     @staticmethod
     def to_response_model(account: GoogleDriveAccountDB) -> GoogleDriveAccountResponse:
@@ -1,11 +1,28 @@
 from app.core.config import settings
 from app.db.mongodb import db
-from app.services.auth_service import create_access_token
+from app.services.auth_service import create_access_token, invalidate_cached_user
 from app.models.google_oauth import GoogleUserInfo
 from datetime import timedelta, datetime
 import httpx
 from typing import Optional, Dict, Any
 
+# Shared client for the Google OAuth endpoints so callbacks reuse a keep-alive connection
+# instead of a new TCP + TLS handshake per call; created lazily, closed on shutdown
+_google_http_client: Optional[httpx.AsyncClient] = None
+
+def _google_client() -> httpx.AsyncClient:
+    global _google_http_client
+    if _google_http_client is None or _google_http_client.is_closed:
+        _google_http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=200, keepalive_expiry=60.0)
+        )
+    return _google_http_client
+
+async def close_google_client() -> None:
+    """Close the shared Google OAuth client (application shutdown hook)"""
+    if _google_http_client is not None:
+        await _google_http_client.aclose()
+
 class GoogleOAuthService:
     """Service for handling Google OAuth authentication"""
     
@@ -40,10 +57,9 @@ class GoogleOAuthService:
             "redirect_uri": settings.GOOGLE_OAUTH_REDIRECT_URI
         }
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=token_data)
-            response.raise_for_status()
-            return response.json()
+        response = await _google_client().post(token_url, data=token_data)
+        response.raise_for_status()
+        return response.json()
     
     @staticmethod
     async def get_user_info(access_token: str) -> GoogleUserInfo:
@@ -51,11 +67,10 @@ class GoogleOAuthService:
         user_info_url = "https://www.googleapis.com/oauth2/v2/userinfo"
         headers = {"Authorization": f"Bearer {access_token}"}
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(user_info_url, headers=headers)
-            response.raise_for_status()
-            user_data = response.json()
-            return GoogleUserInfo(**user_data)
+        response = await _google_client().get(user_info_url, headers=headers)
+        response.raise_for_status()
+        user_data = response.json()
+        return GoogleUserInfo(**user_data)
     
     @staticmethod
     async def authenticate_or_create_user(google_user_info: GoogleUserInfo) -> Dict[str, Any]:
@@ -87,6 +102,7 @@ class GoogleOAuthService:
                 {"email": email},
                 {"$set": update_data}
             )
+            invalidate_cached_user(email)
             
             # Return updated user with all required fields
             user.update(update_data)
@@ -1,7 +1,15 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
+from pymongo import UpdateOne
 from app.db.mongodb import db
 from app.models.user import FileTypeBreakdown, UserProfileResponse
 import re
+import time
+
+# The profile endpoint is polled by the frontend and a user's storage rarely changes between
+# polls, so its aggregate is reused for a few seconds (user_id -> (expires_at, storage_data))
+USER_STORAGE_CACHE_TTL_SECONDS = 10
+USER_STORAGE_CACHE_MAX_ENTRIES = 10000
+_user_storage_cache: Dict[str, Tuple[float, Dict]] = {}
 
 class StorageService:
     
@@ -83,6 +91,92 @@ class StorageService:
             "file_type_breakdown": breakdown
         }
     
+    # Per-user storage counters (files_count / storage_used) denormalised onto user documents
+    # for storage analytics. They are $inc'd where file records are inserted and deleted;
+    # backfill_user_storage_counters (migrate_user_storage_counters.py) seeds them once.
+    
+    @staticmethod
+    def adjust_user_storage_counters(file_docs: Iterable[Dict], sign: int = 1) -> None:
+        """$inc the owners' counters for inserted file records (sign=-1 for deleted ones); blocking"""
+        deltas: Dict[str, list] = {}
+        for file_doc in file_docs:
+            owner_id = file_doc.get("owner_id")
+            if owner_id is None:
+                continue
+            delta = deltas.setdefault(owner_id, [0, 0])
+            delta[0] += 1
+            delta[1] += file_doc.get("size_bytes") or 0
+        if deltas:
+            db.users.bulk_write([
+                UpdateOne({"_id": owner_id}, {"$inc": {"files_count": sign * count, "storage_used": sign * size}})
+                for owner_id, (count, size) in deltas.items()
+            ], ordered=False)
+    
+    @staticmethod
+    def reset_user_storage_counters() -> None:
+        """Zero every non-zero counter (after all file records were purged); blocking"""
+        db.users.update_many(
+            {"$or": [{"files_count": {"$ne": 0}}, {"storage_used": {"$ne": 0}}]},
+            {"$set": {"files_count": 0, "storage_used": 0}}
+        )
+    
+    @staticmethod
+    def backfill_user_storage_counters() -> None:
+        """Recompute the counters from files, writing only users whose values differ; blocking"""
+        db.files.aggregate([
+            {"$match": {"owner_id": {"$ne": None}}},
+            {"$group": {
+                "_id": "$owner_id",
+                "files_count": {"$sum": 1},
+                "storage_used": {"$sum": "$size_bytes"},
+            }},
+            {"$lookup": {
+                "from": "users",
+                "localField": "_id",
+                "foreignField": "_id",
+                "as": "_user",
+                "pipeline": [{"$project": {"files_count": 1, "storage_used": 1}}],
+            }},
+            {"$match": {"$expr": {"$or": [
+                {"$ne": [{"$arrayElemAt": ["$_user.files_count", 0]}, "$files_count"]},
+                {"$ne": [{"$arrayElemAt": ["$_user.storage_used", 0]}, "$storage_used"]},
+            ]}}},
+            {"$project": {"files_count": 1, "storage_used": 1}},
+            {"$merge": {"into": "users", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+        ])
+        # Users that own no files but carry (or lack) counters
+        db.users.aggregate([
+            {"$match": {"$or": [{"files_count": {"$ne": 0}}, {"storage_used": {"$ne": 0}}]}},
+            {"$lookup": {
+                "from": "files",
+                "localField": "_id",
+                "foreignField": "owner_id",
+                "as": "_files",
+                "pipeline": [{"$limit": 1}, {"$project": {"_id": 1}}],
+            }},
+            {"$match": {"_files": []}},
+            {"$project": {"files_count": {"$literal": 0}, "storage_used": {"$literal": 0}}},
+            {"$merge": {"into": "users", "on": "_id", "whenMatched": "merge", "whenNotMatched": "discard"}},
+        ])
+    
+    @staticmethod
+    def get_cached_user_storage(user_id: str) -> Dict:
+        """calculate_user_storage, reused for up to USER_STORAGE_CACHE_TTL_SECONDS per user"""
+        now = time.monotonic()
+        cached = _user_storage_cache.get(user_id)
+        if cached and now < cached[0]:
+            return cached[1]
+        
+        storage_data = StorageService.calculate_user_storage(user_id)
+        if len(_user_storage_cache) >= USER_STORAGE_CACHE_MAX_ENTRIES:
+            for key, (expires_at, _) in list(_user_storage_cache.items()):
+                if expires_at <= now:
+                    _user_storage_cache.pop(key, None)
+            if len(_user_storage_cache) >= USER_STORAGE_CACHE_MAX_ENTRIES:
+                _user_storage_cache.clear()
+        _user_storage_cache[user_id] = (now + USER_STORAGE_CACHE_TTL_SECONDS, storage_data)
+        return storage_data
+    
     @staticmethod
     def build_user_profile_response(user_doc: Dict, storage_data: Optional[Dict] = None) -> UserProfileResponse:
         """Build a complete user profile response with storage data"""
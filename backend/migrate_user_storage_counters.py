@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script for Per-User Storage Counters
+Seeds files_count / storage_used on user documents from the files collection.
+After this runs once, uploads and deletions keep the counters current with $inc.
+"""
+
+import sys
+import os
+
+# Add the app directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.services.storage_service import StorageService
+
+def main():
+    """Main migration function"""
+    
+    print("🚀 Starting per-user storage counter backfill...")
+    print("=" * 50)
+    
+    try:
+        # Only users whose stored counters differ from the files collection are written,
+        # so re-running the script is cheap and also repairs any drift
+        StorageService.backfill_user_storage_counters()
+        
+        print("=" * 50)
+        print("🎉 Backfill completed successfully!")
+        
+    except Exception as e:
+        print(f"❌ Backfill failed: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -282,7 +282,7 @@ export function GoogleDriveManagement() {
             </span>
           </div>
           <span className="text-sm text-slate-500 dark:text-slate-400">
-            Last updated: {formatDateTime(cacheInfo.last_updated)}
+            Last updated: {formatDateTime(new Date(cacheInfo.last_updated * 1000).toISOString())}
           </span>
         </div>
       )}
@@ -10,7 +10,7 @@ export const mockStats: GoogleDriveStats = {
 
 export const mockCacheInfo: CacheInfo = {
   status: 'fresh',
-  last_updated: new Date().toISOString(),
+  last_updated: Math.floor(Date.now() / 1000),
   cache_expiry_seconds: 300, // 5 minutes
   is_forced_refresh: false,
 };
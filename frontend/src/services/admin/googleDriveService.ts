@@ -324,7 +324,7 @@ class GoogleDriveService {
       const response = await this.getAccounts();
       return response.cache_info || {
         status: 'fresh',
-        last_updated: new Date().toISOString(),
+        last_updated: Math.floor(Date.now() / 1000),
         cache_expiry_seconds: 300,
         is_forced_refresh: false
       };
@@ -332,7 +332,7 @@ class GoogleDriveService {
       console.warn('Failed to get cache status:', error);
       return {
         status: 'error',
-        last_updated: new Date().toISOString(),
+        last_updated: Math.floor(Date.now() / 1000),
         cache_expiry_seconds: 0,
         is_forced_refresh: false
       };
@@ -449,7 +449,7 @@ class GoogleDriveService {
       },
       cache_info: {
         status: 'fresh',
-        last_updated: new Date(Date.now() - 300000).toISOString(), // 5 minutes ago
+        last_updated: Math.floor((Date.now() - 300000) / 1000), // 5 minutes ago
         cache_expiry_seconds: 300,
         is_forced_refresh: false
       }
@@ -39,7 +39,7 @@ export interface GoogleDriveAccountsResponse {
   };
   cache_info?: {
     status: 'fresh' | 'stale' | 'error';
-    last_updated: string;
+    last_updated: number; // Unix timestamp (seconds)
     cache_expiry_seconds: number;
     is_forced_refresh: boolean;
   };
@@ -53,7 +53,7 @@ export interface AddAccountRequest {
 
 export interface CacheInfo {
   status: 'fresh' | 'stale' | 'error';
-  last_updated: string;
+  last_updated: number; // Unix timestamp (seconds)
   cache_expiry_seconds: number;
   is_forced_refresh: boolean;
 }